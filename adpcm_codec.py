@@ -4,109 +4,559 @@
 ADPCM音频编解码器
 使用Python内置audioop模块，无需额外依赖
 实现4:1压缩比，带宽从513kbps降至129kbps
+Python 3.13+ 移除了 audioop，此时使用与其码流兼容的 IMA-ADPCM 实现
 """
 
-import audioop
+import array
+import logging
 import numpy as np
-from typing import Tuple, Optional
+from typing import List, Sequence, Tuple, Optional
 import struct
 
+logger = logging.getLogger(__name__)
+
+try:
+    import audioop
+    AUDIOOP_AVAILABLE = True
+except ImportError:
+    AUDIOOP_AVAILABLE = False
+
+# numba 为可选依赖：可用时对逐采样的热点循环做 JIT 编译
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """numba 不可用时的占位装饰器，函数按纯 Python 执行"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, fastmath=True, nogil=True)
+    def _f32_to_i16(x, out):
+        """
+        float32 → int16：限幅、缩放、截断在一次遍历内完成，无中间数组
+
+        限幅写成无分支的 min/max，LLVM 可将循环自动向量化为
+        AVX2 的 vmaxps/vminps → vmulps → vcvttps2dq → vpackssdw
+        """
+        lo = np.float32(-1.0)
+        hi = np.float32(1.0)
+        scale = np.float32(32767.0)
+        for i in range(x.size):
+            out[i] = np.int16(min(max(x[i], lo), hi) * scale)
+else:
+    _I16_SCALE = np.float32(32767.0)
+
+    def _f32_to_i16(x, out):
+        """float32 → int16（numpy 回退实现：限幅后单次 float32 乘法直接写入 int16 输出）"""
+        np.multiply(np.clip(x, -1.0, 1.0), _I16_SCALE, out=out, casting='unsafe')
+
+
+# IMA-ADPCM 标准表（与 audioop 一致）
+_IMA_INDEX_TABLE = (-1, -1, -1, -1, 2, 4, 6, 8,
+                    -1, -1, -1, -1, 2, 4, 6, 8)
+
+_IMA_STEP_TABLE = (
+    7, 8, 9, 10, 11, 12, 13, 14, 16, 17,
+    19, 21, 23, 25, 28, 31, 34, 37, 41, 45,
+    50, 55, 60, 66, 73, 80, 88, 97, 107, 118,
+    130, 143, 157, 173, 190, 209, 230, 253, 279, 307,
+    337, 371, 408, 449, 494, 544, 598, 658, 724, 796,
+    876, 963, 1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066,
+    2272, 2499, 2749, 3024, 3327, 3660, 4026, 4428, 4871, 5358,
+    5894, 6484, 7132, 7845, 8630, 9493, 10442, 11487, 12635, 13899,
+    15289, 16818, 18500, 20350, 22385, 24623, 27086, 29794, 32767,
+)
+
+
+@njit(cache=True)
+def _ima_encode_sample(val, valpred, index):
+    """
+    IMA-ADPCM 单采样编码
+
+    Returns:
+        (delta, valpred, index): 4bit 码字与更新后的编码器状态
+    """
+    step = _IMA_STEP_TABLE[index]
+    diff = val - valpred
+    if diff < 0:
+        sign = 8
+        diff = -diff
+    else:
+        sign = 0
+
+    delta = 0
+    vpdiff = step >> 3
+    if diff >= step:
+        delta = 4
+        diff -= step
+        vpdiff += step
+    step >>= 1
+    if diff >= step:
+        delta |= 2
+        diff -= step
+        vpdiff += step
+    step >>= 1
+    if diff >= step:
+        delta |= 1
+        vpdiff += step
+
+    if sign:
+        valpred -= vpdiff
+    else:
+        valpred += vpdiff
+    if valpred > 32767:
+        valpred = 32767
+    elif valpred < -32768:
+        valpred = -32768
+
+    delta |= sign
+    index += _IMA_INDEX_TABLE[delta]
+    if index < 0:
+        index = 0
+    elif index > 88:
+        index = 88
+    return delta, valpred, index
+
+
+@njit(cache=True)
+def _ima_decode_sample(delta, valpred, index):
+    """
+    IMA-ADPCM 单采样解码
+
+    Returns:
+        (valpred, index): 更新后的解码器状态（valpred 即输出采样）
+    """
+    step = _IMA_STEP_TABLE[index]
+    index += _IMA_INDEX_TABLE[delta]
+    if index < 0:
+        index = 0
+    elif index > 88:
+        index = 88
+
+    vpdiff = step >> 3
+    if delta & 4:
+        vpdiff += step
+    if delta & 2:
+        vpdiff += step >> 1
+    if delta & 1:
+        vpdiff += step >> 2
+
+    if delta & 8:
+        valpred -= vpdiff
+    else:
+        valpred += vpdiff
+    if valpred > 32767:
+        valpred = 32767
+    elif valpred < -32768:
+        valpred = -32768
+    return valpred, index
+
+
+@njit(cache=True, nogil=True)
+def _ima_encode(pcm, valpred, index, out):
+    """
+    IMA-ADPCM 编码：int16 → 4bit，每字节两个采样（先高4位后低4位）
+
+    Returns:
+        (valpred, index): 更新后的编码器状态
+    """
+    outputbuffer = 0
+    for i in range(len(pcm)):
+        delta, valpred, index = _ima_encode_sample(int(pcm[i]), valpred, index)
+        if i & 1 == 0:
+            outputbuffer = (delta << 4) & 0xf0
+        else:
+            out[i >> 1] = (delta & 0x0f) | outputbuffer
+    return valpred, index
+
+
+@njit(cache=True, nogil=True)
+def _ima_decode(adpcm, valpred, index, out):
+    """
+    IMA-ADPCM 解码：4bit → int16，每字节输出两个采样
+
+    Returns:
+        (valpred, index): 更新后的解码器状态
+    """
+    for i in range(len(out)):
+        byte = int(adpcm[i >> 1])
+        delta = (byte >> 4) & 0x0f if i & 1 == 0 else byte & 0x0f
+        valpred, index = _ima_decode_sample(delta, valpred, index)
+        out[i] = valpred
+    return valpred, index
+
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _ima_encode_f32(x, valpred, index, out):
+    """
+    融合编码：float32 → 限幅缩放 → IMA-ADPCM，单次遍历且不产生 int16 中间数组
+
+    Returns:
+        (valpred, index): 更新后的编码器状态
+    """
+    lo = np.float32(-1.0)
+    hi = np.float32(1.0)
+    scale = np.float32(32767.0)
+    outputbuffer = 0
+    for i in range(x.size):
+        v = min(max(x[i], lo), hi)
+        delta, valpred, index = _ima_encode_sample(int(v * scale), valpred, index)
+        if i & 1 == 0:
+            outputbuffer = (delta << 4) & 0xf0
+        else:
+            out[i >> 1] = (delta & 0x0f) | outputbuffer
+    return valpred, index
+
+
+@njit(cache=True, nogil=True)
+def _ima_decode_f32(adpcm, valpred, index, out):
+    """
+    融合解码：IMA-ADPCM → float32，直接写出归一化采样
+
+    Returns:
+        (valpred, index): 更新后的解码器状态
+    """
+    scale = np.float32(32767.0)
+    for i in range(out.size):
+        byte = int(adpcm[i >> 1])
+        delta = (byte >> 4) & 0x0f if i & 1 == 0 else byte & 0x0f
+        valpred, index = _ima_decode_sample(delta, valpred, index)
+        out[i] = np.float32(valpred) / scale
+    return valpred, index
+
+
+def _lin2adpcm(int16_pcm: np.ndarray, state: Optional[tuple]) -> Tuple[bytes, tuple]:
+    """
+    audioop.lin2adpcm(fragment, 2, state) 的等价实现
+
+    纯 Python 回退路径：用 array.array / bytearray 逐采样读写，
+    下标访问直接得到 Python int，避免 numpy 标量的装箱与分派开销。
+    """
+    valpred, index = state if state is not None else (0, 0)
+    samples = array.array('h')
+    samples.frombytes(memoryview(int16_pcm).cast('B'))
+    out = bytearray(len(samples) // 2)
+    valpred, index = _ima_encode(samples, valpred, index, out)
+    return bytes(out), (valpred, index)
+
+
+def _adpcm2lin(adpcm_data: bytes, state: Optional[tuple]) -> Tuple[array.array, tuple]:
+    """audioop.adpcm2lin(fragment, 2, state) 的等价实现（返回 int16 array，支持缓冲区协议）"""
+    valpred, index = state if state is not None else (0, 0)
+    out = array.array('h', bytes(len(adpcm_data) * 4))
+    valpred, index = _ima_decode(adpcm_data, valpred, index, out)
+    return out, (valpred, index)
+
+
+def warm_up(block_size: int = 512) -> None:
+    """
+    预先触发 JIT 内核的编译/缓存加载
+
+    numba 内核在首次调用时才编译（有磁盘缓存时为加载），耗时可达数百毫秒；
+    实时链路启动前调用一次，避免第一个音频块承担这段延迟。
+    """
+    if not NUMBA_AVAILABLE:
+        return
+    pcm = np.zeros(block_size, dtype=np.float32)
+    out = np.empty(block_size // 2, dtype=np.uint8)
+    _ima_encode_f32(pcm, 0, 0, out)
+    # 只读（来自 bytes）与可写（来自批量接收缓冲区的视图）输入各是一种签名，都预先编译
+    _ima_decode_f32(np.frombuffer(out.tobytes(), dtype=np.uint8), 0, 0, pcm)
+    _ima_decode_f32(out, 0, 0, pcm)
+    _f32_to_i16(pcm, np.empty(block_size, dtype=np.int16))
+
+
 class ADPCMCodec:
-    """ADPCM音频编解码器 - 使用Python内置audioop"""
+    """
+    ADPCM音频编解码器
+
+    numba 可用时走融合的 JIT 内核（float32 ↔ ADPCM 一次完成）；
+    否则使用 audioop，再退回纯 Python 的 IMA-ADPCM 实现。三者码流一致。
+    """
     
-    def __init__(self):
+    def __init__(self) -> None:
         """初始化编解码器"""
-        self.encode_state = None  # 编码状态
-        self.decode_state = None  # 解码状态
+        self.encode_state: Optional[Tuple[int, int]] = None  # 编码状态 (valpred, index)
+        self.decode_state: Optional[Tuple[int, int]] = None  # 解码状态 (valpred, index)
         
         # 统计信息
-        self.total_original_bytes = 0
-        self.total_compressed_bytes = 0
-        self.encode_count = 0
-        self.decode_count = 0
+        self.total_original_bytes: int = 0
+        self.total_compressed_bytes: int = 0
+        self.encode_count: int = 0
+        self.decode_count: int = 0
+
+        # int16 暂存缓冲：按最大块预分配，块更大时才扩容，编码时按需切片复用
+        self._i16_scratch: np.ndarray = np.empty(4096, dtype=np.int16)
+        # ADPCM 输出暂存缓冲（融合内核写入后 tobytes 一次拷贝）
+        self._u8_scratch: np.ndarray = np.empty(2048, dtype=np.uint8)
         
     def encode(self, float32_pcm: np.ndarray) -> bytes:
         """
         编码：float32 PCM → ADPCM
         
+        热路径为直线代码，不在内部捕获异常；出错时异常直接抛给调用方
+        （调用方按连接/会话统一处理，而不是每块都付出 try/except 的开销）。
+        
         Args:
             float32_pcm: 输入的float32 PCM数据，范围[-1.0, 1.0]
             
         Returns:
             bytes: ADPCM压缩数据，大小约为输入的1/4
         """
-        try:
-            # 1. 转换为int16 PCM
-            # 确保数据在有效范围内
-            clipped_pcm = np.clip(float32_pcm, -1.0, 1.0)
-            int16_pcm = (clipped_pcm * 32767).astype(np.int16)
-            
-            # 2. ADPCM压缩 (4:1压缩比)
-            # audioop.lin2adpcm(fragment, width, state)
-            # fragment: 音频数据字节
-            # width: 每个采样的字节数 (2 for 16-bit)
-            # state: 编码器状态 (None for first call)
+        pcm = float32_pcm.reshape(-1)
+        n = pcm.size
+
+        if NUMBA_AVAILABLE:
+            # 融合路径：限幅、缩放与 ADPCM 编码在同一个 JIT 内核中完成
+            if self._u8_scratch.size < n // 2:
+                self._u8_scratch = np.empty(n // 2, dtype=np.uint8)
+            out = self._u8_scratch[:n // 2]
+            valpred, index = self.encode_state if self.encode_state is not None else (0, 0)
+            self.encode_state = _ima_encode_f32(pcm, valpred, index, out)
+            adpcm_data = out.tobytes()
+
+            self.total_original_bytes += n * 2
+            self.total_compressed_bytes += len(adpcm_data)
+            self.encode_count += 1
+            return adpcm_data
+
+        # 1. 转换为int16 PCM（限幅+缩放融合为单次遍历，写入缓存缓冲）
+        if self._i16_scratch.size < n:
+            self._i16_scratch = np.empty(n, dtype=np.int16)
+        int16_pcm = self._i16_scratch[:n]
+        _f32_to_i16(pcm, int16_pcm)
+        
+        # 2. ADPCM压缩 (4:1压缩比)
+        # audioop.lin2adpcm(fragment, width, state)
+        # fragment: 音频数据字节
+        # width: 每个采样的字节数 (2 for 16-bit)
+        # state: 编码器状态 (None for first call)
+        # int16 ndarray 支持缓冲区协议，可直接传给 audioop，无需 tobytes()
+        if AUDIOOP_AVAILABLE:
             adpcm_data, self.encode_state = audioop.lin2adpcm(
-                int16_pcm.tobytes(), 2, self.encode_state
+                int16_pcm, 2, self.encode_state
             )
+        else:
+            adpcm_data, self.encode_state = _lin2adpcm(int16_pcm, self.encode_state)
+        
+        # 3. 更新统计信息
+        self.total_original_bytes += len(int16_pcm) * 2  # int16 = 2 bytes per sample
+        self.total_compressed_bytes += len(adpcm_data)
+        self.encode_count += 1
+        
+        return adpcm_data
+
+    def encode_into(self, float32_pcm: np.ndarray, out: np.ndarray) -> int:
+        """
+        编码到调用方提供的 uint8 缓冲区（实时发送路径每块零分配）
+        
+        Args:
+            float32_pcm: 输入的float32 PCM数据，范围[-1.0, 1.0]
+            out: 可写 uint8 数组，容量不少于 len(float32_pcm) // 2
             
-            # 3. 更新统计信息
-            self.total_original_bytes += len(int16_pcm) * 2  # int16 = 2 bytes per sample
-            self.total_compressed_bytes += len(adpcm_data)
+        Returns:
+            int: 写入的ADPCM字节数
+        """
+        pcm = float32_pcm.reshape(-1)
+        m = pcm.size // 2
+        if out.size < m:
+            raise ValueError("输出缓冲区太小")
+
+        if NUMBA_AVAILABLE:
+            valpred, index = self.encode_state if self.encode_state is not None else (0, 0)
+            self.encode_state = _ima_encode_f32(pcm, valpred, index, out[:m])
+
+            self.total_original_bytes += pcm.size * 2
+            self.total_compressed_bytes += m
             self.encode_count += 1
+            return m
+
+        out[:m] = np.frombuffer(self.encode(pcm), dtype=np.uint8)
+        return m
+
+    def encode_into_packet(self, float32_pcm: np.ndarray, out: bytearray,
+                           compression_type: Optional[int] = None) -> memoryview:
+        """
+        编码并打包为完整数据包：ADPCM 直接写在 out 的包头之后，再补写包头
+        （格式同 ADPCMProtocol.pack_audio_packet，省去中间 bytes 和拼接拷贝）
+        
+        Args:
+            float32_pcm: 输入的float32 PCM数据，范围[-1.0, 1.0]
+            out: 可复用的 bytearray，容量不少于包头 + len(float32_pcm) // 2
+            compression_type: 包类型，默认 ADPCMProtocol.COMPRESSION_ADPCM
             
-            return adpcm_data
-            
-        except Exception as e:
-            print(f"ADPCM编码错误: {e}")
-            # 返回空数据，让上层处理
-            return b""
+        Returns:
+            memoryview: out 中已填好的数据包部分，可直接交给 sendto
+        """
+        if compression_type is None:
+            compression_type = ADPCMProtocol.COMPRESSION_ADPCM
+        hdr = _HDR.size
+        m = self.encode_into(float32_pcm, np.frombuffer(out, dtype=np.uint8)[hdr:])
+        _HDR.pack_into(out, 0, compression_type, m)
+        return memoryview(out)[:hdr + m]
         
     def decode(self, adpcm_data: bytes) -> np.ndarray:
         """
         解码：ADPCM → float32 PCM
         
+        与 encode 相同，异常不在内部吞掉，由调用方处理。
+        
         Args:
             adpcm_data: ADPCM压缩数据
             
         Returns:
             np.ndarray: 解码后的float32 PCM数据，范围[-1.0, 1.0]
         """
-        try:
-            if not adpcm_data:
-                return np.array([], dtype=np.float32)
-                
-            # 1. ADPCM解压缩
-            # audioop.adpcm2lin(fragment, width, state)
+        if not adpcm_data:
+            return np.array([], dtype=np.float32)
+
+        if NUMBA_AVAILABLE:
+            # 融合路径：直接解码为 float32，无 int16 中间数组
+            adpcm = np.frombuffer(adpcm_data, dtype=np.uint8)
+            float32_pcm = np.empty(adpcm.size * 2, dtype=np.float32)
+            valpred, index = self.decode_state if self.decode_state is not None else (0, 0)
+            self.decode_state = _ima_decode_f32(adpcm, valpred, index, float32_pcm)
+            self.decode_count += 1
+            return float32_pcm
+            
+        # 1. ADPCM解压缩
+        # audioop.adpcm2lin(fragment, width, state)
+        if AUDIOOP_AVAILABLE:
             int16_pcm_bytes, self.decode_state = audioop.adpcm2lin(
                 adpcm_data, 2, self.decode_state
             )
+        else:
+            int16_pcm_bytes, self.decode_state = _adpcm2lin(adpcm_data, self.decode_state)
+        
+        # 2. 转换为float32 PCM
+        # frombuffer 为零拷贝视图；类型转换与缩放合并为一次分配。
+        # 输出不复用暂存缓冲：服务器会把解码块放入队列，复用会导致数据被覆盖
+        int16_pcm = np.frombuffer(int16_pcm_bytes, dtype=np.int16)
+        float32_pcm = np.divide(int16_pcm, np.float32(32767.0), dtype=np.float32)
+        
+        # 3. 更新统计信息
+        self.decode_count += 1
+        
+        return float32_pcm
+        
+    def decode_into(self, adpcm_data: bytes, out: np.ndarray) -> int:
+        """
+        解码到调用方提供的 float32 缓冲区（接收路径可复用预分配的块，每帧零分配）
+        
+        Args:
+            adpcm_data: ADPCM压缩数据
+            out: 可写 float32 数组，容量不少于 len(adpcm_data) * 2
             
-            # 2. 转换为float32 PCM
-            int16_pcm = np.frombuffer(int16_pcm_bytes, dtype=np.int16)
-            float32_pcm = int16_pcm.astype(np.float32) / 32767.0
-            
-            # 3. 更新统计信息
+        Returns:
+            int: 写入的采样数
+        """
+        n = len(adpcm_data) * 2
+        if out.size < n:
+            raise ValueError("输出缓冲区太小")
+        if not n:
+            return 0
+
+        if NUMBA_AVAILABLE:
+            valpred, index = self.decode_state if self.decode_state is not None else (0, 0)
+            self.decode_state = _ima_decode_f32(np.frombuffer(adpcm_data, dtype=np.uint8), valpred, index, out[:n])
             self.decode_count += 1
-            
-            return float32_pcm
-            
-        except Exception as e:
-            print(f"ADPCM解码错误: {e}")
-            # 返回静音数据，避免程序崩溃
-            return np.zeros(512, dtype=np.float32)  # 假设512采样的静音
-        
-    def reset_encoder(self):
+            return n
+
+        out[:n] = self.decode(adpcm_data)
+        return n
+
+    def encode_batch(self, float32_pcm: np.ndarray, block_size: int = 512) -> List[bytes]:
+        """
+        批量编码：整段 float32 PCM 按块编码，编码器状态在块间延续
+
+        与逐块调用 encode 的结果一致，但限幅缩放只做一次（整段向量化），
+        逐块循环不再重复分配与异常处理开销。末尾不足 block_size 的部分也会编码。
+
+        Args:
+            float32_pcm: 输入的float32 PCM数据，范围[-1.0, 1.0]
+            block_size: 每块采样数
+
+        Returns:
+            List[bytes]: 每块的ADPCM压缩数据
+        """
+        pcm = float32_pcm.reshape(-1)
+        int16_pcm = np.empty(pcm.size, dtype=np.int16)
+        _f32_to_i16(pcm, int16_pcm)
+
+        blocks = []
+        state = self.encode_state
+        for off in range(0, int16_pcm.size, block_size):
+            block = int16_pcm[off:off + block_size]
+            if NUMBA_AVAILABLE:
+                out = np.empty(block.size // 2, dtype=np.uint8)
+                valpred, index = state if state is not None else (0, 0)
+                state = _ima_encode(block, valpred, index, out)
+                blocks.append(out.tobytes())
+            elif AUDIOOP_AVAILABLE:
+                adpcm_data, state = audioop.lin2adpcm(block, 2, state)
+                blocks.append(adpcm_data)
+            else:
+                adpcm_data, state = _lin2adpcm(block, state)
+                blocks.append(adpcm_data)
+        self.encode_state = state
+
+        self.total_original_bytes += int16_pcm.size * 2
+        self.total_compressed_bytes += sum(len(b) for b in blocks)
+        self.encode_count += len(blocks)
+        return blocks
+
+    def decode_batch(self, adpcm_blocks: List[bytes]) -> np.ndarray:
+        """
+        批量解码：依次解码多块ADPCM数据，直接写入一个预分配的float32数组
+
+        Args:
+            adpcm_blocks: 按顺序排列的ADPCM压缩数据块
+
+        Returns:
+            np.ndarray: 拼接后的float32 PCM数据，范围[-1.0, 1.0]
+        """
+        total = sum(len(b) for b in adpcm_blocks) * 2
+        float32_pcm = np.empty(total, dtype=np.float32)
+
+        state = self.decode_state
+        off = 0
+        for adpcm_data in adpcm_blocks:
+            n = len(adpcm_data) * 2
+            out = float32_pcm[off:off + n]
+            if NUMBA_AVAILABLE:
+                valpred, index = state if state is not None else (0, 0)
+                state = _ima_decode_f32(np.frombuffer(adpcm_data, dtype=np.uint8),
+                                        valpred, index, out)
+            else:
+                if AUDIOOP_AVAILABLE:
+                    int16_pcm_bytes, state = audioop.adpcm2lin(adpcm_data, 2, state)
+                else:
+                    int16_pcm_bytes, state = _adpcm2lin(adpcm_data, state)
+                np.divide(np.frombuffer(int16_pcm_bytes, dtype=np.int16),
+                          np.float32(32767.0), out=out, dtype=np.float32)
+            off += n
+        self.decode_state = state
+
+        self.decode_count += len(adpcm_blocks)
+        return float32_pcm
+
+    def reset_encoder(self) -> None:
         """重置编码器状态"""
         self.encode_state = None
-        print("ADPCM编码器状态已重置")
+        logger.debug("ADPCM编码器状态已重置")
         
-    def reset_decoder(self):
+    def reset_decoder(self) -> None:
         """重置解码器状态"""
         self.decode_state = None
-        print("ADPCM解码器状态已重置")
+        logger.debug("ADPCM解码器状态已重置")
         
-    def reset_all(self):
+    def reset_all(self) -> None:
         """重置所有状态和统计"""
         self.reset_encoder()
         self.reset_decoder()
@@ -114,24 +564,37 @@ class ADPCMCodec:
         self.total_compressed_bytes = 0
         self.encode_count = 0
         self.decode_count = 0
-        print("ADPCM编解码器完全重置")
+        logger.debug("ADPCM编解码器完全重置")
         
-    def get_compression_ratio(self) -> float:
-        """获取压缩比"""
+    @property
+    def ratio(self) -> float:
+        """压缩比（监控轮询用，只做一次除法，不做字符串格式化）"""
         if self.total_compressed_bytes == 0:
             return 0.0
         return self.total_original_bytes / self.total_compressed_bytes
-        
-    def get_bandwidth_savings(self) -> float:
-        """获取带宽节省百分比"""
+
+    @property
+    def savings_pct(self) -> float:
+        """带宽节省百分比"""
         if self.total_original_bytes == 0:
             return 0.0
         return (1 - self.total_compressed_bytes / self.total_original_bytes) * 100
+
+    def get_compression_ratio(self) -> float:
+        """获取压缩比"""
+        return self.ratio
+        
+    def get_bandwidth_savings(self) -> float:
+        """获取带宽节省百分比"""
+        return self.savings_pct
         
     def get_statistics(self) -> str:
-        """获取详细统计信息"""
-        compression_ratio = self.get_compression_ratio()
-        bandwidth_savings = self.get_bandwidth_savings()
+        """获取详细统计信息（供人工查看；数值监控请直接读取 ratio / savings_pct）"""
+        return str(self)
+
+    def __str__(self) -> str:
+        compression_ratio = self.ratio
+        bandwidth_savings = self.savings_pct
         
         return f"""ADPCM编解码统计:
 编码次数: {self.encode_count}
@@ -143,31 +606,120 @@ class ADPCMCodec:
 理论带宽: {513 * (1 - bandwidth_savings/100):.0f} kbps"""
 
 
+# 协议头: [1字节压缩类型][4字节数据长度]，预编译避免每次解析格式串
+_HDR = struct.Struct('!BI')
+_FRAME_LEN = struct.Struct('!H')
+
+
 class ADPCMProtocol:
     """ADPCM协议处理器 - 处理网络传输协议"""
 
     COMPRESSION_NONE = 0
     COMPRESSION_ADPCM = 1
     COMPRESSION_TTS_MP3 = 2
+    COMPRESSION_ADPCM_BATCH = 3
     CONTROL_RESET = 100
     CONTROL_HELLO = 101
+    HEADER_SIZE = _HDR.size
+    BATCH_HEADER_SIZE = _HDR.size + 1  # 外层协议头 + 1字节帧数
+    BATCH_FRAME_HDR = _FRAME_LEN
     
     @staticmethod
-    def pack_audio_packet(audio_data: bytes, compression_type: int = COMPRESSION_ADPCM) -> bytes:
+    def pack_audio_packet(audio_data: bytes, compression_type: int = COMPRESSION_ADPCM) -> bytearray:
         """
         打包音频数据为网络传输格式
         
         格式: [1字节压缩类型][4字节数据长度][音频数据]
         
+        一次分配完整大小的缓冲，协议头原地写入，负载只拷贝一次
+        （不再生成 header + audio_data 的中间对象）。
+        
         Args:
             audio_data: 音频数据（原始PCM或ADPCM压缩）
             compression_type: 压缩类型标识
             
         Returns:
-            bytes: 打包后的网络数据包
+            bytearray: 打包后的网络数据包（socket.sendto 可直接发送）
+        """
+        buf = bytearray(_HDR.size + len(audio_data))
+        _HDR.pack_into(buf, 0, compression_type, len(audio_data))
+        buf[_HDR.size:] = audio_data
+        return buf
+
+    @staticmethod
+    def pack_audio_batch(frames: Sequence[bytes]) -> bytearray:
         """
-        return struct.pack('!BI', compression_type, len(audio_data)) + audio_data
+        把多个 ADPCM 帧合并为一个数据包（一次发送、摊薄 UDP/IP 头开销）
+        
+        格式: [1字节类型=ADPCM_BATCH][4字节负载长度][1字节帧数]{[2字节帧长][帧数据]}...
         
+        Args:
+            frames: ADPCM 帧列表（至多 255 帧）
+            
+        Returns:
+            bytearray: 打包后的网络数据包
+        """
+        body = 1 + sum(_FRAME_LEN.size + len(f) for f in frames)
+        buf = bytearray(_HDR.size + body)
+        ADPCMProtocol.pack_batch_header_into(buf, len(frames), len(buf))
+        off = ADPCMProtocol.BATCH_HEADER_SIZE
+        for f in frames:
+            _FRAME_LEN.pack_into(buf, off, len(f))
+            off += _FRAME_LEN.size
+            buf[off:off + len(f)] = f
+            off += len(f)
+        return buf
+
+    @staticmethod
+    def pack_batch_header_into(out: bytearray, frame_count: int, end: int) -> int:
+        """
+        为已就地写入 out[BATCH_HEADER_SIZE:end] 的帧序列补写批量包头
+        
+        Returns:
+            int: 数据包总字节数（即 end）
+        """
+        _HDR.pack_into(out, 0, ADPCMProtocol.COMPRESSION_ADPCM_BATCH, end - _HDR.size)
+        out[_HDR.size] = frame_count
+        return end
+
+    @staticmethod
+    def pack_single_header_into(out: bytearray, end: int) -> int:
+        """
+        只攒了一帧时，把批量缓冲改写为普通 ADPCM 包（兼容只认类型 1 的旧服务器）
+        
+        帧数据位于 out[BATCH_HEADER_SIZE + 2:end]，普通包头紧挨着写在它前面，不移动数据
+        
+        Returns:
+            int: 数据包起始偏移（数据包为 out[start:end]）
+        """
+        start = ADPCMProtocol.BATCH_HEADER_SIZE + _FRAME_LEN.size - _HDR.size
+        _HDR.pack_into(out, start, ADPCMProtocol.COMPRESSION_ADPCM, end - start - _HDR.size)
+        return start
+
+    @staticmethod
+    def unpack_audio_batch(payload) -> List[memoryview]:
+        """
+        拆分批量包负载（unpack_audio_packet 返回的负载部分）
+        
+        Returns:
+            List[memoryview]: 各 ADPCM 帧（负载上的切片，不拷贝）
+        """
+        mv = memoryview(payload)
+        if len(mv) < 1:
+            raise ValueError("批量数据包太小")
+        frames = []
+        off = 1
+        for _ in range(mv[0]):
+            if off + _FRAME_LEN.size > len(mv):
+                raise ValueError("批量数据包不完整")
+            (n,) = _FRAME_LEN.unpack_from(mv, off)
+            off += _FRAME_LEN.size
+            if off + n > len(mv):
+                raise ValueError("批量数据包不完整")
+            frames.append(mv[off:off + n])
+            off += n
+        return frames
+
     @staticmethod
     def unpack_audio_packet(packet: bytes) -> Tuple[int, bytes]:
         """
@@ -179,21 +731,21 @@ class ADPCMProtocol:
         Returns:
             Tuple[int, bytes]: (压缩类型, 音频数据)
         """
-        if len(packet) < 5:  # 最小包大小
+        if len(packet) < _HDR.size:  # 最小包大小
             raise ValueError("数据包太小")
             
-        compression_type, data_length = struct.unpack('!BI', packet[:5])
+        compression_type, data_length = _HDR.unpack_from(packet, 0)
         
-        if len(packet) < 5 + data_length:
+        if len(packet) < _HDR.size + data_length:
             raise ValueError("数据包不完整")
             
-        audio_data = packet[5:5+data_length]
+        audio_data = packet[_HDR.size:_HDR.size + data_length]
         return compression_type, audio_data
 
     @staticmethod
     def pack_control(cmd: int) -> bytes:
         """打包控制命令（无负载）"""
-        return struct.pack('!BI', cmd, 0)
+        return _HDR.pack(cmd, 0)
 
 
 def benchmark_adpcm():
@@ -209,11 +761,15 @@ def benchmark_adpcm():
     t = np.linspace(0, duration, sample_rate * duration)
     
     # 混合频率的测试信号（更接近真实语音）
-    test_audio = (
-        0.3 * np.sin(2 * np.pi * 440 * t) +  # 440Hz
-        0.2 * np.sin(2 * np.pi * 880 * t) +  # 880Hz
-        0.1 * np.sin(2 * np.pi * 1320 * t)   # 1320Hz
-    ).astype(np.float32)
+    # 用预分配缓冲 + out= 原地累加，避免每个分量各自产生多个临时数组
+    test_audio = np.zeros(len(t), dtype=np.float32)
+    phase = np.empty_like(t)
+    component = np.empty(len(t), dtype=np.float32)
+    for amplitude, freq in ((0.3, 440), (0.2, 880), (0.1, 1320)):
+        np.multiply(t, 2 * np.pi * freq, out=phase)
+        np.sin(phase, out=component)
+        component *= amplitude
+        test_audio += component
     
     codec = ADPCMCodec()
     block_size = 512
@@ -221,37 +777,32 @@ def benchmark_adpcm():
     # 编码测试
     print("📤 编码测试...")
     encode_start = time.time()
-    compressed_blocks = []
     
-    for i in range(0, len(test_audio), block_size):
-        block = test_audio[i:i+block_size]
-        if len(block) == block_size:  # 只处理完整块
-            compressed = codec.encode(block)
-            compressed_blocks.append(compressed)
+    # 只处理完整块
+    full_len = len(test_audio) // block_size * block_size
+    compressed_blocks = codec.encode_batch(test_audio[:full_len], block_size)
             
     encode_time = time.time() - encode_start
     
     # 解码测试
     print("📥 解码测试...")
     decode_start = time.time()
-    decoded_blocks = []
     
     # 重置解码器状态
     codec.reset_decoder()
     
-    for compressed in compressed_blocks:
-        decoded = codec.decode(compressed)
-        decoded_blocks.append(decoded)
+    # 重建完整音频
+    reconstructed = codec.decode_batch(compressed_blocks)
         
     decode_time = time.time() - decode_start
     
-    # 重建完整音频
-    reconstructed = np.concatenate(decoded_blocks)
     original_trimmed = test_audio[:len(reconstructed)]
     
-    # 计算音质指标
-    mse = np.mean((original_trimmed - reconstructed) ** 2)
-    snr = 10 * np.log10(np.mean(original_trimmed ** 2) / mse) if mse > 0 else float('inf')
+    # 计算音质指标（点积求平方和：只分配一次差值数组，省去 **2 临时数组）
+    diff = original_trimmed - reconstructed
+    mse = float(np.dot(diff, diff)) / diff.size
+    signal_power = float(np.dot(original_trimmed, original_trimmed)) / original_trimmed.size
+    snr = 10 * np.log10(signal_power / mse) if mse > 0 else float('inf')
     
     # 输出结果
     print(f"\n📊 性能结果:")
@@ -10,7 +10,16 @@ REM 创建图标文件
 "%VENV%\python.exe" create_icons.py
 
 REM 运行 PyInstaller 打包（onedir，保留控制台日志为False）
-"%VENV%\pyinstaller.exe" --noconsole --onedir --name AntiFraudClient gui_udp_client.py
+REM 排除客户端用不到的测试/构建子模块，减小产物体积、加快冷启动
+"%VENV%\pyinstaller.exe" --noconsole --onedir --name AntiFraudClient ^
+  --exclude-module=numpy.f2py ^
+  --exclude-module=numpy.testing ^
+  --exclude-module=numpy.distutils ^
+  --exclude-module=numpy.doc ^
+  --exclude-module=pygame.tests ^
+  --exclude-module=pygame.examples ^
+  --exclude-module=tkinter.test ^
+  gui_udp_client.py
 
 IF %ERRORLEVEL% NEQ 0 (
   echo Build failed.
@@ -97,11 +97,10 @@ def main():
     reset_icon.save(os.path.join(assets_dir, 'reset.png'))
     
     # 保存 ICO 文件（多尺寸）
-    app_icon_sizes = []
-    for size in [16, 32, 48, 64]:
-        app_icon_sizes.append(create_app_icon(size))
-    
-    app_icon_sizes[0].save(
+    # 只在高分辨率下绘制一次，小尺寸由 LANCZOS 缩放得到（抗锯齿效果也更好）
+    # ICO 编码器按 sizes 自行从高分辨率原图缩放各尺寸
+    master = create_app_icon(256)
+    master.save(
         os.path.join(assets_dir, 'app.ico'),
         format='ICO',
         sizes=[(16, 16), (32, 32), (48, 48), (64, 64)]
@@ -8,133 +8,304 @@ GUI UDP 客户端（最小改动版）
 """
 
 import socket
+import selectors
 import threading
 import time
 import queue
-import tempfile
+import collections
 import os
+import sys
 import logging
+import logging.handlers
 import json
+from typing import NamedTuple, Optional
 
 import numpy as np
 import sounddevice as sd
 from tkinter import Tk, Button, Text, END, DISABLED, NORMAL, PhotoImage
 
-from adpcm_codec import ADPCMCodec, ADPCMProtocol
-
-def load_config(config_file="client_config.json"):
+from adpcm_codec import ADPCMCodec, ADPCMProtocol, warm_up
+from mp3_player import MP3Player
+from udp_batch import BatchReceiver
+
+class ClientConfig(NamedTuple):
+    """客户端配置（只读）：启动时从 JSON 展平一次，运行期不再做嵌套字典查找"""
+    server_ip: str = "127.0.0.1"
+    server_port: int = 31000
+    sample_rate: int = 16000
+    channels: int = 1
+    chunk_size: int = 512
+    max_udp_size: int = 65507
+    timeout: float = 5.0
+    send_batch: int = 4
+    socket_buffer: int = 4 * 1024 * 1024
+    recv_cpu: Optional[int] = None
+    window_title: str = "反作弊语音客户端"
+    window_size: str = "600x500"
+    log_level: str = "INFO"
+    log_file: str = "logs/client.log"
+    log_console: bool = True
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "ClientConfig":
+        """由 client_config.json 的嵌套结构构造，缺失项取默认值"""
+        return cls(**{field: raw[section][key]
+                      for field, (section, key) in _CONFIG_KEYS.items()
+                      if key in raw.get(section, {})})
+
+
+# ClientConfig 字段 → JSON 中的 (分组, 键)
+_CONFIG_KEYS = {
+    "server_ip": ("server", "ip"),
+    "server_port": ("server", "port"),
+    "sample_rate": ("audio", "sample_rate"),
+    "channels": ("audio", "channels"),
+    "chunk_size": ("audio", "chunk_size"),
+    "max_udp_size": ("network", "max_udp_size"),
+    "timeout": ("network", "timeout"),
+    "send_batch": ("network", "send_batch"),
+    "socket_buffer": ("network", "socket_buffer"),
+    "recv_cpu": ("network", "recv_cpu"),
+    "window_title": ("ui", "window_title"),
+    "window_size": ("ui", "window_size"),
+    "log_level": ("logging", "level"),
+    "log_file": ("logging", "file"),
+    "log_console": ("logging", "console"),
+}
+
+
+def load_config(config_file="client_config.json") -> ClientConfig:
     """加载配置文件"""
     try:
         with open(config_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+            return ClientConfig.from_dict(json.load(f))
     except FileNotFoundError:
         print(f"配置文件 {config_file} 不存在，使用默认配置")
-        return {
-            "server": {"ip": "127.0.0.1", "port": 31000},
-            "audio": {"sample_rate": 16000, "channels": 1, "chunk_size": 512},
-            "network": {"max_udp_size": 65507, "timeout": 5.0},
-            "ui": {"window_title": "反作弊语音客户端", "window_size": "600x500"},
-            "logging": {"level": "INFO", "file": "logs/client.log", "console": True}
-        }
     except json.JSONDecodeError as e:
-        print(f"配置文件格式错误: {e}")
-        return load_config()  # 返回默认配置
+        print(f"配置文件格式错误: {e}，使用默认配置")
+    return ClientConfig()
 
 # 加载配置
 CONFIG = load_config()
 
+# 日志窗口保留的最大行数
+MAX_LOG_LINES = 500
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueListener 在同一进程内：记录原样入队，消息格式化留给监听线程"""
+
+    def prepare(self, record):
+        return record
+
+
 class GUIClient:
-    def __init__(self, config=None):
+    PLAYBACK_RATE = 22050  # TTS 播放输出采样率
+    MAX_TX_PACKET = 1200  # 单个上行包上限，低于常见 MTU，避免 IP 分片
+    CAPTURE_SLOTS = 32  # 约 1 秒音频，编码线程落后超过此数才会覆盖未处理的块
+
+    def __init__(self, config=None, root=None):
         if config is None:
             config = CONFIG
+        # Tk 根窗口：有日志时投递 <<LogUpdate>> 事件，由主线程取队列刷新
+        self.root = root
 
         # 服务器配置
-        self.server = (config["server"]["ip"], config["server"]["port"])
+        self.server = (config.server_ip, config.server_port)
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # 放大收发缓冲，TTS 段（单包最大约 60KB）成串到达时不被内核丢弃
+        sock_buf = config.socket_buffer
+        for opt in (socket.SO_RCVBUF, socket.SO_SNDBUF):
+            try:
+                self.sock.setsockopt(socket.SOL_SOCKET, opt, sock_buf)
+            except OSError:
+                pass  # 超出系统上限时保持默认值
+        if sys.platform.startswith("linux"):
+            # 上行包都小于 MAX_TX_PACKET：置 DF 位，绝不在 IP 层分片
+            try:
+                self.sock.setsockopt(socket.IPPROTO_IP, getattr(socket, "IP_MTU_DISCOVER", 10), 2)  # IP_PMTUDISC_DO
+            except OSError:
+                pass
+            # 套接字连接到服务器：音频包直接 os.write 到 fd，省去 sendto 的地址解析与对象开销；
+            # 连接后内核也只接收来自服务器的数据报
+            try:
+                self.sock.connect(self.server)
+                self._tx_fd = self.sock.fileno()
+            except OSError:
+                self._tx_fd = None
+        else:
+            self._tx_fd = None
 
         # 音频配置
-        self.sample_rate = config["audio"]["sample_rate"]
-        self.channels = config["audio"]["channels"]
-        self.chunk_size = config["audio"]["chunk_size"]
+        self.sample_rate = config.sample_rate
+        self.channels = config.channels
+        self.chunk_size = config.chunk_size
 
         # 网络配置
-        self.max_udp_size = config["network"]["max_udp_size"]
-        self.timeout = config["network"]["timeout"]
+        self.max_udp_size = config.max_udp_size
+        self.timeout = config.timeout
+        # 发送有积压时最多 N 个音频帧合并成一个 UDP 包（受 MAX_TX_PACKET 限制）
+        self.send_batch = max(1, config.send_batch)
+        # 可选：把接收线程固定到指定 CPU（仅 Linux），None 表示不绑定
+        self.recv_cpu = config.recv_cpu
 
         # UI配置
-        self.window_title = config["ui"]["window_title"]
-        self.window_size = config["ui"]["window_size"]
+        self.window_title = config.window_title
+        self.window_size = config.window_size
 
         self.codec = ADPCMCodec()
+        # 开始采集前完成 JIT 编译，首个音频块不承担编译延迟
+        warm_up(self.chunk_size * self.channels)
+        # 发包缓冲：帧长 + ADPCM 帧依次就地写入，补写包头后一次发出（每帧零分配）。
+        # 没有积压时每帧立即发出；编码线程落后或内核发送缓冲已满时才把多帧合成一包，
+        # 一包最多 frames_per_packet 帧
+        frame_size = ADPCMProtocol.BATCH_FRAME_HDR.size + (self.chunk_size * self.channels) // 2
+        self.frames_per_packet = max(1, min(
+            self.send_batch, (self.MAX_TX_PACKET - ADPCMProtocol.BATCH_HEADER_SIZE) // frame_size))
+        self._tx_buf = bytearray(ADPCMProtocol.BATCH_HEADER_SIZE + self.frames_per_packet * frame_size)
+        self._tx_arr = np.frombuffer(self._tx_buf, dtype=np.uint8)
+        self._tx_off = ADPCMProtocol.BATCH_HEADER_SIZE
+        self._tx_count = 0
+        # 服务器不可达（ICMP 端口不可达）期间只记一次日志；收到服务器数据后复位
+        self._server_unreachable = False
+        # 采集环形缓冲：回调只拷贝进槽位并投递槽位号，编码与发送在独立线程完成
+        self._pool = np.zeros((self.CAPTURE_SLOTS, self.chunk_size * self.channels), dtype=np.float32)
+        self._slot = 0
+        self._slot_q = queue.SimpleQueue()
+        self._capture_status = None
+        self._send_count = 0
+        self.encode_thread = threading.Thread(target=self._encode_send_loop, daemon=True)
         self.running = False
         self.stream = None
-        self.log_queue = queue.Queue()
+        # UI 日志缓冲：有界双端队列，窗口来不及刷新时自动丢弃最旧的行
+        self.log_queue = collections.deque(maxlen=1000)
+        self._log_pending = False  # 已投递 <<LogUpdate>> 且界面尚未取走
         # 简单聚合器：短时间内到达的多个MP3片段合并后再播，避免乱序
         self._agg_chunks = []
         self._agg_last_time = 0.0
 
-        # 日志到文件
-        log_dir = os.path.dirname(config["logging"]["file"])
+        # 日志到文件/控制台：各线程只把 LogRecord 放进队列，
+        # 格式化与写文件由 QueueListener 的后台线程完成，热路径不碰文件锁
+        log_dir = os.path.dirname(config.log_file)
         if log_dir:
             os.makedirs(log_dir, exist_ok=True)
-        logging.basicConfig(filename=config["logging"]["file"],
-                            level=getattr(logging, config["logging"]["level"]),
-                            format='%(asctime)s %(levelname)s %(message)s')
+        file_handler = logging.FileHandler(config.log_file, encoding='utf-8')
+        file_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+        handlers = [file_handler]
+        if config.log_console:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(logging.Formatter('%(message)s'))
+            handlers.append(console_handler)
+        log_q = queue.SimpleQueue()
+        root_logger = logging.getLogger()
+        root_logger.setLevel(getattr(logging, config.log_level))
+        root_logger.addHandler(_DeferredQueueHandler(log_q))
+        self._log_listener = logging.handlers.QueueListener(log_q, *handlers, respect_handler_level=True)
+        self._log_listener.start()
 
         # 接收线程
         self.recv_thread = threading.Thread(target=self._recv_loop, daemon=True)
 
-        # 播放队列（解决播放阻塞接收的问题）
-        self.play_queue = queue.Queue()
+        # 播放队列（解决播放阻塞接收的问题）：接收线程单生产、播放线程单消费，
+        # SimpleQueue 的 put 不取锁、无 Condition/task_done 记账
+        self.play_queue = queue.SimpleQueue()
         self.player_thread = threading.Thread(target=self._player_loop, daemon=True)
 
-    def log(self, msg: str):
-        print(msg)
-        logging.info(msg)
-        self.log_queue.put(msg)
+        # 音频输出只初始化一次，后续播放直接复用
+        self.player = MP3Player(self.PLAYBACK_RATE, log=self.log)
+
+    def log(self, msg: str, *args):
+        """
+        记录一条日志。热路径用 %-格式加参数调用（如 self.log("大小: %d", n)），
+        字符串格式化推迟到日志监听线程和界面线程，调用线程只做入队
+        """
+        logging.info(msg, *args)
+        self.log_queue.append((msg, args))
+        # 先入队再看标志：界面线程先清标志再取空队列，不会漏掉这一行；
+        # 一串突发日志只投递一次事件
+        if self.root is not None and not self._log_pending:
+            self._log_pending = True
+            try:
+                self.root.event_generate('<<LogUpdate>>', when='tail')
+            except Exception:
+                # 窗口已销毁或 mainloop 尚未运行：复位标志，下一条日志再投递（已入队的行届时一并取出）
+                self._log_pending = False
 
     def _recv_loop(self):
         self.log("📡 接收线程已启动，开始监听UDP包...")
+        if self.recv_cpu is not None:
+            self._pin_recv_cpu(self.recv_cpu)
+        # 就绪通知驱动：静音时线程完全挂起，有数据时一次唤醒取空所有已到达的包
+        sel = selectors.DefaultSelector()
+        self.sock.setblocking(False)
+        sel.register(self.sock, selectors.EVENT_READ)
+        receiver = BatchReceiver(self.sock, bufsize=self.max_udp_size)
+        # 热循环里用到的属性/方法提前绑定为局部变量
+        select = sel.select
+        recv_batch = receiver.recv
+        unpack = ADPCMProtocol.unpack_audio_packet
+        TTS_MP3 = ADPCMProtocol.COMPRESSION_TTS_MP3
+        log = self.log
+        enqueue = self.play_queue.put
         backoff = 0.1
         while True:
             try:
-                self.sock.settimeout(2.0)
-                pkt, addr = self.sock.recvfrom(self.max_udp_size)
-                t, payload = ADPCMProtocol.unpack_audio_packet(pkt)
-                self.log(f"📦 收到UDP包: 类型={t}, 大小={len(payload)}, 来源={addr}")
-                if t == ADPCMProtocol.COMPRESSION_TTS_MP3:
-                    # 统一协议：每个UDP负载即为可独立播放的MP3片段
-                    self.log(f"📤 收到MP3片段，大小: {len(payload)} 字节")
-                    self.play_queue.put(payload)
+                select()
+                while True:
+                    # Linux 下一次 recvmmsg 取出一批；包体是接收缓冲区视图，入队前拷贝
+                    batch = recv_batch()
+                    if not batch:
+                        break
+                    self._server_unreachable = False
+                    for pkt, addr in batch:
+                        # 客户端只关心 TTS 下行：先看首字节类型，其余包不解析
+                        if not pkt or pkt[0] != TTS_MP3:
+                            continue
+                        t, payload = unpack(pkt)
+                        log("📦 收到UDP包: 类型=%d, 大小=%d, 来源=%s", t, len(payload), addr)
+                        # 统一协议：每个UDP负载即为可独立播放的MP3片段
+                        log("📤 收到MP3片段，大小: %d 字节", len(payload))
+                        enqueue(bytes(payload))
                 backoff = 0.1
-            except socket.timeout:
-                # 静音时没有回复是正常的
-                pass
+            except ConnectionRefusedError:
+                # 上行触发的 ICMP 端口不可达在接收侧同样报一次错：错误已被这次调用取走，直接继续
+                continue
             except Exception as e:
                 self.log(f"client recv error: {e}")
                 time.sleep(backoff)
                 backoff = min(backoff * 2, 2.0)
 
+    def _pin_recv_cpu(self, cpu: int):
+        """把接收线程与套接字的接收处理固定在同一 CPU 上，减少跨核迁移带来的缓存失效"""
+        if not hasattr(os, "sched_setaffinity"):
+            self.log("⚠️ 当前系统不支持线程绑核，忽略 recv_cpu")
+            return
+        try:
+            os.sched_setaffinity(0, {cpu})  # 0 = 当前线程
+            self.sock.setsockopt(socket.SOL_SOCKET, getattr(socket, "SO_INCOMING_CPU", 49), cpu)
+            self.log(f"📌 接收线程已绑定到 CPU {cpu}")
+        except OSError as e:
+            self.log(f"⚠️ 绑核失败: {e}")
+
     def _player_loop(self):
         """独立播放线程：轮询队列，播放完一个再取下一个"""
         self.log("🎵 播放线程已启动，等待队列中的MP3...")
         while True:
             try:
                 # 阻塞等待队列中的MP3
-                self.log(f"📥 等待队列中的MP3... (当前队列大小: {self.play_queue.qsize()})")
+                self.log("📥 等待队列中的MP3... (当前队列大小: %d)", self.play_queue.qsize())
                 audio_bytes = self.play_queue.get()
                 if audio_bytes is None:  # 退出信号
                     self.log("🛑 收到退出信号，播放线程结束")
                     break
 
-                self.log(f"📥 从队列取出MP3: {len(audio_bytes)} 字节")
+                self.log("📥 从队列取出MP3: %d 字节", len(audio_bytes))
 
-                # 播放这个MP3（阻塞直到播放完成）
+                # 播放这个MP3（前一段仍在播放时排入通道队列，排入即返回）
                 self._play_mp3_bytes(audio_bytes)
 
-                # 播放完成，继续轮询下一个
-                self.play_queue.task_done()
-                self.log("✅ 播放完成，继续等待下一个...")
+                # 已交给混音器，继续取下一个
+                self.log("✅ 已提交播放，继续等待下一个...")
 
             except Exception as e:
                 self.log(f"❌ 播放线程错误: {e}")
@@ -143,134 +314,96 @@ class GUIClient:
                 time.sleep(0.1)
 
     def _play_mp3_bytes(self, audio_bytes: bytes):
-        self.log(f"🔊 开始播放MP3，大小: {len(audio_bytes)} 字节")
-        try:
-            # 创建临时文件
-            with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as tmp:
-                tmp.write(audio_bytes)
-                tmp.flush()  # 确保数据写入磁盘
-                path = tmp.name
-
-            self.log(f"📁 临时文件创建: {path}")
-
-            try:
-                import pygame
-
-                # 重新初始化mixer，确保干净状态
-                if pygame.mixer.get_init():
-                    pygame.mixer.quit()
-
-                # 初始化音频系统
-                pygame.mixer.pre_init(frequency=22050, size=-16, channels=2, buffer=1024)
-                pygame.mixer.init()
-                self.log("🎵 pygame mixer 初始化成功")
-
-                # 加载并播放
-                pygame.mixer.music.load(path)
-                pygame.mixer.music.play()
-                self.log("▶️ 开始播放音频...")
-
-                # 等待播放完成
-                play_start = time.time()
-                while pygame.mixer.music.get_busy():
-                    time.sleep(0.1)
-                    # 防止无限等待
-                    if time.time() - play_start > 30:
-                        self.log("⚠️ 播放超时，强制停止")
-                        pygame.mixer.music.stop()
-                        break
+        self.log("🔊 开始播放MP3，大小: %d 字节", len(audio_bytes))
+        self.player.play(audio_bytes)
 
-                self.log("✅ 音频播放完成")
-
-                # 确保pygame完全释放文件
-                pygame.mixer.music.unload()
-                time.sleep(0.1)  # 给系统一点时间释放文件句柄
-
-            except Exception as e:
-                self.log(f"❌ pygame播放错误: {e}")
-                # 尝试备用播放方法
-                self._try_alternative_play(path)
-
-            finally:
-                # 清理临时文件
+    def _audio_callback(self, indata, frames, time_info, status):
+        # PortAudio 实时线程：只做一次拷贝和投递，不编码、不发包、不写日志
+        if status:
+            self._capture_status = status
+        slot = self._slot
+        np.copyto(self._pool[slot], indata.reshape(-1))
+        self._slot = (slot + 1) % self.CAPTURE_SLOTS
+        self._slot_q.put_nowait(slot)
+
+    def _encode_send_loop(self):
+        """编码发送线程：取槽位 → ADPCM 编码 → 打包 → 发送（有积压时合包）"""
+        while True:
+            slot = self._slot_q.get()
+            if slot is None:  # 退出信号：发出尾包后结束
                 try:
-                    if os.path.exists(path):
-                        os.unlink(path)
-                        self.log(f"🗑️ 临时文件已删除: {path}")
+                    self._flush_pending()
                 except Exception as e:
-                    self.log(f"⚠️ 删除临时文件失败: {e}")
-
-        except Exception as e:
-            self.log(f"❌ MP3播放总体错误: {e}")
-            import traceback
-            self.log(f"详细错误: {traceback.format_exc()}")
-
-    def _try_alternative_play(self, file_path):
-        """备用播放方法"""
-        try:
-            import subprocess
-            import platform
-
-            system = platform.system().lower()
-            self.log(f"🔄 尝试系统播放器，系统: {system}")
-
-            if system == "windows":
-                # Windows: 使用系统默认播放器
-                os.startfile(file_path)
-                self.log("🎵 使用Windows默认播放器")
-            elif system == "darwin":  # macOS
-                subprocess.run(["afplay", file_path], check=True)
-                self.log("🎵 使用macOS afplay")
-            else:  # Linux
-                # 尝试多个Linux播放器
-                players = ["mpg123", "mplayer", "vlc", "paplay"]
-                for player in players:
-                    try:
-                        subprocess.run([player, file_path], check=True, timeout=30)
-                        self.log(f"🎵 使用{player}播放成功")
-                        return
-                    except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
-                        continue
-                self.log("❌ 所有备用播放器都失败")
-
-        except Exception as e:
-            self.log(f"❌ 备用播放方法失败: {e}")
+                    self.log(f"❌ 音频发送失败: {e}")
+                break
 
+            if self._capture_status:
+                self.log(f"🎤 音频状态: {self._capture_status}")
+                self._capture_status = None
 
-    def _audio_callback(self, indata, frames, time_info, status):
-        if status:
-            self.log(f"🎤 音频状态: {status}")
+            block = self._pool[slot]
+            try:
+                off = self._tx_off
+                hdr_size = ADPCMProtocol.BATCH_FRAME_HDR.size
+                m = self.codec.encode_into(block, self._tx_arr[off + hdr_size:])
+                ADPCMProtocol.BATCH_FRAME_HDR.pack_into(self._tx_buf, off, m)
+                self._tx_off = off + hdr_size + m
+                self._tx_count += 1
+                # 后面还有待编码的块就先攒着，与之合包；否则立即发出，不额外增加延迟
+                if self._tx_count >= self.frames_per_packet or self._slot_q.empty():
+                    self._flush_pending()
+
+                # 减少日志频率
+                self._send_count += 1
 
-        block = indata.flatten().astype(np.float32)
+                # 只在有声音且每512个包时记录一次（位与判断；RMS 用点积，不生成平方临时数组）
+                if self._send_count & 511 == 0:
+                    volume = np.sqrt(np.dot(block, block) / block.size)
+                    if volume > 0.02:
+                        self.log("🎤 音频活跃，已发送 %d 包", self._send_count)
 
-        # 检测音频强度（减少日志）
-        volume = np.sqrt(np.mean(block**2))
+            except Exception as e:
+                self.log(f"❌ 音频发送失败: {e}")
 
+    def _flush_pending(self):
+        """把已攒的音频帧封成一个批量包发出；只有一帧时发普通 ADPCM 包"""
+        if not self._tx_count:
+            return
+        keep = False
         try:
-            compressed = self.codec.encode(block)
-            pkt = ADPCMProtocol.pack_audio_packet(compressed, ADPCMProtocol.COMPRESSION_ADPCM)
-            self.sock.sendto(pkt, self.server)
-
-            # 减少日志频率
-            if hasattr(self, '_send_count'):
-                self._send_count += 1
+            if self._tx_count == 1:
+                start = ADPCMProtocol.pack_single_header_into(self._tx_buf, self._tx_off)
             else:
-                self._send_count = 1
-
-            # 只在有声音且每500个包时记录一次
-            if volume > 0.02 and self._send_count % 500 == 0:
-                self.log(f"🎤 音频活跃，已发送 {self._send_count} 包")
-
-        except Exception as e:
-            self.log(f"❌ 音频发送失败: {e}")
+                start = 0
+                ADPCMProtocol.pack_batch_header_into(self._tx_buf, self._tx_count, self._tx_off)
+            pkt = memoryview(self._tx_buf)[start:self._tx_off]
+            if self._tx_fd is not None:
+                os.write(self._tx_fd, pkt)
+            else:
+                self.sock.sendto(pkt, self.server)
+        except BlockingIOError:
+            # 内核发送缓冲已满：未攒满一包就保留这些帧，下一帧到来时合并重试；
+            # 攒满仍发不出去则丢弃，不积压过时的音频
+            keep = self._tx_count < self.frames_per_packet
+            if not keep:
+                self.log("⚠️ 发送缓冲已满，丢弃 %d 帧", self._tx_count)
+        except ConnectionRefusedError:
+            # 已连接套接字在下一次调用上报告服务器端口不可达（服务器未启动/重启中）：
+            # 丢弃这些帧，整个中断期间只记一次日志，不刷屏
+            if not self._server_unreachable:
+                self._server_unreachable = True
+                self.log("⚠️ 服务器不可达，音频帧将被丢弃，直到收到服务器数据")
+        finally:
+            if not keep:
+                self._tx_off = ADPCMProtocol.BATCH_HEADER_SIZE
+                self._tx_count = 0
 
     def start_stream(self):
         if self.running:
             return
         try:
             # 发送连接信号，触发服务器发送开场白
-            hello_pkt = ADPCMProtocol.pack_control(ADPCMProtocol.CONTROL_HELLO)
-            self.sock.sendto(hello_pkt, self.server)
+            self._send_control(ADPCMProtocol.CONTROL_HELLO)
 
             self.stream = sd.InputStream(
                 dtype='float32',
@@ -279,16 +412,30 @@ class GUIClient:
                 blocksize=self.chunk_size,
                 callback=self._audio_callback
             )
+            if not self.encode_thread.is_alive():
+                self.encode_thread.start()
             self.stream.start()
             self.running = True
             self.log("🎙️ 已开始采集，等待开场白...")
         except Exception as e:
             self.log(f"audio stream error: {e}")
 
-    def reset_session(self):
+    def _send_control(self, cmd: int):
+        """
+        发送控制包
+
+        已连接套接字上挂起的端口不可达错误（之前服务器未启动）会在这次发送时报出，
+        错误随之清除，重发一次即可
+        """
+        pkt = ADPCMProtocol.pack_control(cmd)
         try:
-            pkt = ADPCMProtocol.pack_control(ADPCMProtocol.CONTROL_RESET)
             self.sock.sendto(pkt, self.server)
+        except ConnectionRefusedError:
+            self.sock.sendto(pkt, self.server)
+
+    def reset_session(self):
+        try:
+            self._send_control(ADPCMProtocol.CONTROL_RESET)
             # 客户端本地也清一下编码状态，视觉上更干净
             self.codec.reset_all()
             self.log("🧹 已请求服务器重置会话（提示词级）")
@@ -301,16 +448,21 @@ class GUIClient:
                 self.stream.stop(); self.stream.close()
         except:
             pass
+        if self.encode_thread.is_alive():
+            self._slot_q.put(None)
+            self.encode_thread.join(timeout=1.0)
         try:
             self.sock.close()
         except:
             pass
+        self.player.close()
+        self._log_listener.stop()  # 写出队列中剩余的日志
 
 
 def run_gui():
-    app = GUIClient()
-
     root = Tk()
+    app = GUIClient(root=root)
+
     root.title(app.window_title)
     root.geometry(app.window_size)
 
@@ -325,14 +477,25 @@ def run_gui():
     txt = Text(root, height=12, width=56)
     txt.pack(pady=10)
 
-    def pump_logs():
-        while not app.log_queue.empty():
-            line = app.log_queue.get()
+    def drain_logs(_event=None):
+        # 一次取空队列，合并为单次 insert，突发日志只触发一次重绘
+        app._log_pending = False
+        lines = []
+        try:
+            while True:
+                msg, args = app.log_queue.popleft()
+                lines.append(msg % args if args else msg)
+        except IndexError:
+            pass
+        if lines:
             txt.configure(state=NORMAL)
-            txt.insert(END, line + "\n")
+            txt.insert(END, "\n".join(lines) + "\n")
+            # 只保留最近的若干行，避免长时间运行后控件内容无限增长
+            txt.delete("1.0", f"end-{MAX_LOG_LINES}l")
             txt.see(END)
             txt.configure(state=DISABLED)
-        root.after(100, pump_logs)
+
+    root.bind('<<LogUpdate>>', drain_logs)
 
     # 优先使用图标按钮；无图标时回退文字
     try:
@@ -359,7 +522,7 @@ def run_gui():
         app.close(); root.destroy()
 
     root.protocol("WM_DELETE_WINDOW", on_close)
-    pump_logs()
+    drain_logs()  # 取出窗口建好前已产生的日志
     app.recv_thread.start()
     app.player_thread.start()
     root.mainloop()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TTS MP3 播放（GUI 客户端与命令行客户端共用）
+- 首选 miniaudio：内存解码为 PCM，写入常驻的 sounddevice 输出流，不经过 pygame
+- 备用 pygame：mixer 只初始化一次，Sound 从内存加载后排入保留通道
+"""
+
+import io
+import time
+import traceback
+from typing import Callable
+
+import numpy as np
+import sounddevice as sd
+
+# miniaudio 为可选依赖：安装后在进程内解码 MP3 直接播放，不再初始化 pygame
+try:
+    import miniaudio
+    MINIAUDIO_AVAILABLE = True
+except ImportError:
+    MINIAUDIO_AVAILABLE = False
+
+
+class MP3Player:
+    """
+    串行播放独立的 MP3 片段
+
+    play() 把一段交给输出设备后即返回（前一段仍在播放时排在其后），
+    调用方在自己的播放线程里逐段调用即可实现无缝接续。
+    """
+
+    def __init__(self, sample_rate: int = 22050, log: Callable[[str], None] = print):
+        self.sample_rate = sample_rate
+        self.log = log
+        self._mixer_ready = False
+        self._tts_channel = None
+        self._out_stream = None  # miniaudio 播放输出流，首次需要时打开
+
+    def play(self, audio_bytes: bytes):
+        """播放一段 MP3；错误只记录日志，不抛给调用方"""
+        if MINIAUDIO_AVAILABLE:
+            try:
+                self._play_with_miniaudio(audio_bytes)
+                return
+            except Exception as e:
+                self.log(f"❌ miniaudio播放错误: {e}")
+        try:
+            self._play_with_pygame(audio_bytes)
+        except Exception as err:
+            self.log(f"❌ MP3播放总体错误: {err}")
+            self.log(f"详细错误: {traceback.format_exc()}")
+
+    def _play_with_miniaudio(self, audio_bytes: bytes):
+        """
+        miniaudio 内存解码为 PCM（解码时直接重采样到输出流采样率），
+        写入常驻的 sounddevice 输出流：无临时文件、无子进程。
+        write() 在数据交给 PortAudio 后即返回，下一段紧接着写入，段间无轮询间隙
+        """
+        decoded = miniaudio.decode(audio_bytes,
+                                   output_format=miniaudio.SampleFormat.SIGNED16,
+                                   nchannels=1, sample_rate=self.sample_rate)
+        pcm = np.frombuffer(decoded.samples, dtype=np.int16).reshape(-1, 1)
+
+        if self._out_stream is None:
+            self._out_stream = sd.OutputStream(samplerate=self.sample_rate, channels=1, dtype='int16')
+            self._out_stream.start()
+            self.log("🎵 输出流已打开（miniaudio + sounddevice）")
+        self._out_stream.write(pcm)
+
+    def _init_mixer(self):
+        """初始化 pygame mixer（只做一次，避免每次播放都重开音频设备）"""
+        try:
+            import pygame
+            pygame.mixer.pre_init(frequency=self.sample_rate, size=-16, channels=1, buffer=1024)
+            pygame.mixer.init()
+            # TTS 固定走保留的 0 号通道，不参与 Sound.play() 的空闲通道查找
+            pygame.mixer.set_reserved(1)
+            self._tts_channel = pygame.mixer.Channel(0)
+            self._mixer_ready = True
+            self.log("🎵 pygame mixer 初始化成功")
+        except Exception as e:
+            self._mixer_ready = False
+            self.log(f"⚠️ pygame mixer 初始化失败: {e}")
+
+    def _play_with_pygame(self, audio_bytes: bytes):
+        """备用播放：pygame Sound 从内存加载，排入保留通道"""
+        if not self._mixer_ready:
+            self._init_mixer()
+            if not self._mixer_ready:
+                raise RuntimeError("pygame mixer 不可用")
+
+        import pygame
+
+        # 直接从内存加载，无临时文件读写（解码与上一段的播放重叠进行）
+        sound = pygame.mixer.Sound(io.BytesIO(audio_bytes))
+        channel = self._tts_channel
+
+        # 通道队列只能排一段：等上一段排队的声音开始播放后再排入
+        wait_start = time.time()
+        while channel.get_queue() is not None:
+            time.sleep(0.05)
+            # 防止无限等待
+            if time.time() - wait_start > 30:
+                self.log("⚠️ 播放超时，强制停止")
+                channel.stop()
+                break
+
+        if channel.get_busy():
+            # 当前段结束后由 SDL 无缝接续，无轮询间隙
+            channel.queue(sound)
+            self.log("⏭️ 已排入播放队列")
+        else:
+            channel.play(sound)
+            self.log("▶️ 开始播放音频...")
+
+    def close(self):
+        try:
+            if self._out_stream is not None:
+                self._out_stream.stop(); self._out_stream.close()
+        except Exception:
+            pass
+        self._out_stream = None
+        if self._mixer_ready:
+            try:
+                import pygame
+                pygame.mixer.quit()
+            except Exception:
+                pass
+            self._mixer_ready = False
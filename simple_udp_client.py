@@ -8,18 +8,20 @@
 - 接收：MP3 下行，一次性播放
 """
 
+import selectors
 import socket
 import threading
-import tempfile
 import time
-import os
+import sys
 import json
-from queue import Queue
+from queue import SimpleQueue
 
 import numpy as np
 import sounddevice as sd
 
-from adpcm_codec import ADPCMCodec, ADPCMProtocol
+from adpcm_codec import ADPCMCodec, ADPCMProtocol, warm_up
+from mp3_player import MP3Player
+from udp_batch import BatchReceiver
 
 # 读取配置（如果存在）
 def load_config(path="client_config.json"):
@@ -33,11 +35,31 @@ _cfg = load_config()
 SERVER_IP = _cfg["server"].get("ip", "127.0.0.1")
 SERVER_PORT = int(_cfg["server"].get("port", 31000))
 MAX_UDP = 65507
+PLAYBACK_RATE = 22050
+SOCKET_RCVBUF = 4 * 1024 * 1024  # TTS 段成串到达时不被内核丢弃
+SOCKET_SNDBUF = 1 * 1024 * 1024
 
 class UDPVoiceClient:
     def __init__(self, server_ip: str = SERVER_IP, server_port: int = SERVER_PORT):
         self.server = (server_ip, server_port)
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        for opt, size in ((socket.SO_RCVBUF, SOCKET_RCVBUF), (socket.SO_SNDBUF, SOCKET_SNDBUF)):
+            try:
+                self.sock.setsockopt(socket.SOL_SOCKET, opt, size)
+            except OSError:
+                pass  # 超出系统上限时保持默认值
+        rcvbuf = self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+        if rcvbuf < SOCKET_RCVBUF:
+            print(f"⚠️ 接收缓冲被系统限制为 {rcvbuf} 字节（请求 {SOCKET_RCVBUF}）")
+        if sys.platform.startswith("linux"):
+            # 上行 ADPCM 包远小于 MTU：置 DF 位，绝不在 IP 层分片
+            try:
+                self.sock.setsockopt(socket.IPPROTO_IP, getattr(socket, "IP_MTU_DISCOVER", 10), 2)  # IP_PMTUDISC_DO
+            except OSError:
+                pass
+        # 非阻塞套接字只设置一次：接收线程用 selector 等待（2 秒超时检查 running），
+        # 就绪后批量取包
+        self.sock.setblocking(False)
 
         # Windows UDP 10054 兼容：关闭 ICMP Port Unreachable 触发的异常
         try:
@@ -47,7 +69,10 @@ class UDPVoiceClient:
             pass
 
         self.codec = ADPCMCodec()
+        warm_up()  # 编码内核提前编译，首个音频回调不承担 JIT 延迟
+        self._tx_buf = bytearray(4096)  # 上行包缓冲，每块复用
         self.running = True
+        self.player = MP3Player(PLAYBACK_RATE)
 
         # 接收线程
         self.recv_thread = threading.Thread(target=self._recv_loop, daemon=True)
@@ -61,29 +86,42 @@ class UDPVoiceClient:
             self.sock.close()
         except:
             pass
+        self.player.close()
 
     def _recv_loop(self):
+        sel = selectors.DefaultSelector()
+        sel.register(self.sock, selectors.EVENT_READ)
+        # Linux 下一次 recvmmsg 取出所有已到达的包，其他平台逐个 recvfrom
+        receiver = BatchReceiver(self.sock, bufsize=MAX_UDP)
+        TTS_MP3 = ADPCMProtocol.COMPRESSION_TTS_MP3
         backoff = 0.1
         while self.running:
             try:
-                self.sock.settimeout(2.0)
-                pkt, _ = self.sock.recvfrom(MAX_UDP)
-                t, payload = ADPCMProtocol.unpack_audio_packet(pkt)
-                if t == ADPCMProtocol.COMPRESSION_TTS_MP3:
-                    # 统一协议：每个UDP负载即为可独立播放的MP3片段
-                    print(f"收到 MP3 片段，大小: {len(payload)} 字节")
-                    if not hasattr(self, '_play_q'):
-                        self._play_q = Queue()
-                        threading.Thread(target=self._player_loop, daemon=True).start()
-                    try:
-                        self._play_q.put_nowait(payload)
-                    except Exception:
-                        pass
+                if not sel.select(timeout=2.0):
+                    # 静音状态下的超时是正常的，不打印错误
+                    continue
+                while True:
+                    batch = receiver.recv()
+                    if not batch:
+                        break
+                    for pkt, _ in batch:
+                        if not pkt or pkt[0] != TTS_MP3:
+                            continue
+                        t, payload = ADPCMProtocol.unpack_audio_packet(pkt)
+                        # 统一协议：每个UDP负载即为可独立播放的MP3片段
+                        print(f"收到 MP3 片段，大小: {len(payload)} 字节")
+                        if not hasattr(self, '_play_q'):
+                            self._play_q = SimpleQueue()
+                            threading.Thread(target=self._player_loop, daemon=True).start()
+                        try:
+                            # 包体是接收缓冲区视图，入队前拷贝
+                            self._play_q.put_nowait(bytes(payload))
+                        except Exception:
+                            pass
                 backoff = 0.1  # 成功则重置退避
-            except socket.timeout:
-                # 静音状态下的超时是正常的，不打印错误
-                pass
             except Exception as e:
+                if not self.running:
+                    break
                 print(f"client recv error: {e}")
                 time.sleep(backoff)
                 backoff = min(backoff * 2, 2.0)
@@ -93,37 +131,14 @@ class UDPVoiceClient:
         while True:
             try:
                 payload = self._play_q.get()
-                self._play_mp3_bytes(payload)
+                self.player.play(payload)
             except Exception:
                 time.sleep(0.01)
 
-    def _play_mp3_bytes(self, audio_bytes: bytes):
-        try:
-            with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as tmp:
-                tmp.write(audio_bytes)
-                path = tmp.name
-            try:
-                import pygame
-                if pygame.mixer.get_init():
-                    pygame.mixer.quit()
-                pygame.mixer.init()
-                pygame.mixer.music.load(path)
-                pygame.mixer.music.play()
-                while pygame.mixer.music.get_busy():
-                    time.sleep(0.05)
-                pygame.mixer.music.unload()
-            finally:
-                try:
-                    os.unlink(path)
-                except:
-                    pass
-        except Exception as e:
-            print(f"play mp3 error: {e}")
-
     def send_block(self, float_block: np.ndarray):
-        compressed = self.codec.encode(float_block)
-        pkt = ADPCMProtocol.pack_audio_packet(compressed, ADPCMProtocol.COMPRESSION_ADPCM)
         try:
+            # 编码结果直接写入复用的包缓冲区（包头之后），无中间 bytes
+            pkt = self.codec.encode_into_packet(float_block, self._tx_buf)
             self.sock.sendto(pkt, self.server)
             
         except Exception as e:
@@ -137,8 +152,9 @@ def main():
     def audio_callback(indata, frames, time_info, status):
         if status:
             print(status)
-        block = indata.flatten().astype(np.float32)
-        client.send_block(block)
+        # InputStream 已是 float32/单声道：(frames, 1) 连续数组 reshape 为一维视图直接编码，
+        # 不再 flatten+astype 拷贝（与 GUI 客户端一致）
+        client.send_block(indata.reshape(-1))
 
     try:
         with sd.InputStream(dtype='float32', channels=1, samplerate=16000, blocksize=512, callback=audio_callback):
@@ -6,17 +6,20 @@
 - 下行：真实 Edge TTS 生成 MP3 → UDP 回发（一次性）
 """
 
+import selectors
 import socket
 import threading
-import queue
+import collections
 import time
-from typing import Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
 
 import numpy as np
 import struct
 
 import whisper.config as config
-from adpcm_codec import ADPCMCodec, ADPCMProtocol
+from adpcm_codec import ADPCMCodec, ADPCMProtocol, warm_up
+from udp_batch import RECVMMSG_AVAILABLE, BatchReceiver, send_many
 from whisper.vad_module import VADModule
 from whisper.audio_handler import AudioHandler
 from whisper.transcriber_module import Transcriber
@@ -32,14 +35,19 @@ from tts_module_udp_adapter import TTSModuleUDPAdapter
 
 UDP_PORT = 31000
 MAX_UDP = 65507
+FRAME_SAMPLES = 512  # 上行每帧采样数（float32/16kHz/mono/512块）
+BLOCK_POOL_SIZE = 256  # 预分配的解码块数，用尽时临时新分配
+REPLY_WORKERS = 4  # 并行生成回复的客户端数上限
+SOCKET_SNDBUF = 4 * 1024 * 1024  # 下行 MP3 段一次性突发发出，由内核缓冲/背压，不在段间 sleep
+# 接收套接字/线程数（默认 1，需显式开启）：>1 时用 SO_REUSEPORT 绑定同一端口，由内核按四元组分流
+RECV_WORKERS = int(os.getenv("UDP_RECV_WORKERS", 1)) if hasattr(socket, "SO_REUSEPORT") else 1
 
 class UDPVoiceServer:
     def __init__(self, host: str = "0.0.0.0", port: int = UDP_PORT):
         self.addr = (host, port)
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-
-        # 设置端口重用选项，避免"Address already in use"错误
-        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # 多接收套接字模式下首个套接字只作端口探测，SO_REUSEADDR/SO_REUSEPORT 都不设：
+        # 残留的旧实例照常触发 errno 98 并走自动清理，而不是与新实例共享端口、悄悄分走一部分客户端
+        self.sock = self._open_socket(reuse_addr=RECV_WORKERS == 1)
 
         try:
             self.sock.bind(self.addr)
@@ -58,27 +66,78 @@ class UDPVoiceServer:
             else:
                 raise
 
+        # 多接收套接字：确认端口空闲后换成带 SO_REUSEPORT 的套接字重新绑定，再绑定其余套接字。
+        # 同一客户端的数据报总落在同一套接字上，帧序不乱；self.sock 兼作下行发送套接字
+        self.socks = [self.sock]
+        if RECV_WORKERS > 1:
+            bound = self.sock.getsockname()
+            self.sock.close()
+            self.sock = self._open_socket(reuse_port=True)
+            self.sock.bind(bound)
+            self.socks = [self.sock]
+            for _ in range(RECV_WORKERS - 1):
+                extra = self._open_socket(reuse_port=True)
+                try:
+                    extra.bind(bound)
+                except OSError as e:
+                    extra.close()
+                    print(f"⚠️ 额外接收套接字绑定失败，以 {len(self.socks)} 个接收线程运行: {e}")
+                    break
+                self.socks.append(extra)
+
         self.running = True
 
         # 初始化数据结构与模块（确保即使未调用清理函数也已就绪）
         self.client_codecs: Dict[Tuple[str,int], ADPCMCodec] = {}
-        self.client_queues: Dict[Tuple[str,int], queue.Queue] = {}
+        self.client_queues: Dict[Tuple[str,int], collections.deque] = {}
         self.client_handlers: Dict[Tuple[str,int], AudioHandler] = {}
         self.client_ai: Dict[Tuple[str,int], KimiAI] = {}
+        # 接收线程有新帧入队时置位，处理线程空闲时在此等待（代替定时轮询）
+        self._frames_ready = threading.Event()
+        # 转写→LLM→TTS 工作线程池：一个客户端的回复生成不阻塞其他客户端的接收与 VAD。
+        # 每个客户端的任务按到达顺序排在 client_jobs 中，同一时刻至多一个在池中执行，
+        # 工作线程不会为等同一客户端的上一段回复而空占
+        self._reply_pool = ThreadPoolExecutor(max_workers=REPLY_WORKERS, thread_name_prefix="reply")
+        self.client_jobs: Dict[Tuple[str,int], collections.deque] = {}
+        self._jobs_running = set()  # 已有任务在池中排队/执行的客户端
+        self._jobs_lock = threading.Lock()  # 保护 client_jobs 与 _jobs_running
+        # 解码块池：接收线程取块解码，处理线程用完归还（deque 两端操作无锁）
+        self._block_pool = collections.deque(
+            np.empty(FRAME_SAMPLES, dtype=np.float32) for _ in range(BLOCK_POOL_SIZE))
+        # 仍被 AudioHandler 录音缓冲引用的块，触发/清空后才能归还
+        self._held_blocks: Dict[Tuple[str,int], list] = {}
 
         # 共享模块
         self.vad = VADModule(config.VAD_SENSITIVITY)
         self.transcriber = Transcriber(config.WHISPER_MODEL_SIZE, config.DEVICE)
         self.tts_udp = TTSModuleUDPAdapter()
+        # ADPCM 解码内核提前编译/加载缓存，第一个客户端的首包不承担这段延迟
+        warm_up()
 
-        # 处理线程
-        self.recv_thread = threading.Thread(target=self._recv_loop, daemon=True)
+        # 处理线程：每个接收套接字一个接收线程
+        self.recv_threads = [threading.Thread(target=self._recv_loop, args=(sock,), daemon=True)
+                             for sock in self.socks]
+        self.recv_thread = self.recv_threads[0]
         self.proc_thread = threading.Thread(target=self._process_loop, daemon=True)
 
         # 会话管理
         self.client_last_activity = {}
         self.client_welcomed = set()
 
+    def _open_socket(self, reuse_addr: bool = False, reuse_port: bool = False) -> socket.socket:
+        """创建服务器 UDP 套接字（尚未绑定）"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        if reuse_addr:
+            # 设置端口重用选项，避免"Address already in use"错误
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_SNDBUF)
+        except OSError:
+            pass  # 超出系统上限时保持默认值
+        return sock
+
     def _kill_existing_process(self, port: int):
         """尝试杀死占用指定端口的进程"""
         import subprocess
@@ -103,7 +162,7 @@ class UDPVoiceServer:
 
         # 多客户端：为每个客户端维护独立的编解码状态、缓冲队列与会话上下文
         self.client_codecs: Dict[Tuple[str,int], ADPCMCodec] = {}
-        self.client_queues: Dict[Tuple[str,int], queue.Queue] = {}
+        self.client_queues: Dict[Tuple[str,int], collections.deque] = {}
         self.client_handlers: Dict[Tuple[str,int], AudioHandler] = {}
         self.client_ai: Dict[Tuple[str,int], KimiAI] = {}
 
@@ -122,22 +181,66 @@ class UDPVoiceServer:
         self.client_welcomed = set()  # 记录已发送开场白的客户端
 
     def start(self):
-        print(f"UDPVoiceServer listening on {self.addr}")
-        self.recv_thread.start()
+        print(f"UDPVoiceServer listening on {self.addr} ({len(self.socks)} 个接收线程)")
+        for t in self.recv_threads:
+            t.start()
         self.proc_thread.start()
 
     def stop(self):
         self.running = False
-        self.sock.close()
+        for sock in self.socks:
+            sock.close()
+        self._reply_pool.shutdown(wait=False, cancel_futures=True)
 
     def _get_client_codec(self, addr: Tuple[str,int]) -> ADPCMCodec:
         if addr not in self.client_codecs:
             self.client_codecs[addr] = ADPCMCodec()
         return self.client_codecs[addr]
 
-    def _get_client_queue(self, addr: Tuple[str,int]) -> queue.Queue:
+    def _submit_client_job(self, addr: Tuple[str,int], fn, *args):
+        """
+        把客户端的一个任务（开场白/回复生成）排入其 FIFO 队列
+
+        该客户端没有任务在执行时才向线程池提交一个执行者；已有则由执行者做完
+        当前任务后接着取，保证同一客户端的回复按触发顺序逐个生成
+        """
+        with self._jobs_lock:
+            self.client_jobs.setdefault(addr, collections.deque()).append((fn, args))
+            if addr in self._jobs_running:
+                return
+            self._jobs_running.add(addr)
+        self._reply_pool.submit(self._run_client_job, addr)
+
+    def _run_client_job(self, addr: Tuple[str,int]):
+        """执行该客户端队首的一个任务；还有排队任务就重新提交自己，把工作线程让给其他客户端轮转"""
+        with self._jobs_lock:
+            jobs = self.client_jobs.get(addr)
+            if not jobs:
+                self._jobs_running.discard(addr)
+                return
+            fn, args = jobs.popleft()
+        try:
+            fn(addr, *args)
+        finally:
+            with self._jobs_lock:
+                more = bool(self.client_jobs.get(addr))
+                if not more:
+                    self._jobs_running.discard(addr)
+            if more:
+                try:
+                    self._reply_pool.submit(self._run_client_job, addr)
+                except RuntimeError:
+                    pass  # 服务器正在停止，线程池已关闭
+
+    def _get_client_queue(self, addr: Tuple[str,int]) -> collections.deque:
+        """
+        每个客户端一个单生产者（接收线程）/单消费者（处理线程）的帧队列
+
+        deque 的 append/popleft 在 GIL 下是原子的，不取锁、无 Condition；
+        maxlen 满时 append 自动丢弃最旧的帧（与原先 Full 时丢最旧一帧一致）
+        """
         if addr not in self.client_queues:
-            self.client_queues[addr] = queue.Queue(maxsize=1000)
+            self.client_queues[addr] = collections.deque(maxlen=1000)
         return self.client_queues[addr]
 
     def _get_client_handler(self, addr: Tuple[str,int]) -> AudioHandler:
@@ -153,46 +256,52 @@ class UDPVoiceServer:
         return self.client_ai[addr]
 
     def _send_opening_statement(self, addr: Tuple[str,int]):
-        """向新客户端发送开场白（方案B：切句小段发送）"""
+        """向新客户端发送开场白（方案B：切句小段发送），经 client_jobs 与该客户端的回复生成串行"""
         try:
             print(f"为新客户端 {addr} 生成开场白...")
             kimi = self._get_client_ai(addr)
             opening_stream = kimi.generate_opening_statement()
             # 切句合成，单句发送，避免UDP分片
-            seg_list = self.tts_udp.generate_mp3_segments_from_stream(opening_stream)
-            if seg_list:
-                total = len(seg_list)
-                size_sum = sum(len(b) for b in seg_list)
-                print(f"开场白共 {total} 段，总大小: {size_sum} 字节")
-                for i, b in enumerate(seg_list, 1):
-                    print(f"发送开场白段 {i}/{total}，大小: {len(b)}")
-                    self._send_mp3_safe(addr, b)
-                    # 按要求控制节奏，确保前端先消费第一个分片
-                    time.sleep(0.2)
-            else:
-                # 兜底：整段发送（可能会触发分片）
-                mp3_bytes = self.tts_udp.generate_mp3_from_stream(opening_stream)
-                if mp3_bytes:
-                    print(f"开场白 MP3 大小: {len(mp3_bytes)} 字节")
-                    self._send_mp3_safe(addr, mp3_bytes)
+            if not self._stream_tts_to_client(addr, opening_stream, "开场白"):
+                print("开场白 TTS 生成失败，无 MP3 数据")
         except Exception as e:
             print(f"开场白发送失败: {e}")
 
-    def _send_mp3_safe(self, addr: Tuple[str,int], mp3_bytes: bytes):
-        """安全发送 MP3（自动处理分片）"""
-        # 检查 UDP 包大小限制
-        max_payload = 60000  # 留一些余量给协议头
-        if len(mp3_bytes) > max_payload:
-            # 理论上不会到这里：上层已确保每段 <= max_payload
-            print(f"⚠️ 收到超限 MP3 ({len(mp3_bytes)} 字节)，回退为单段发送")
+    def _stream_tts_to_client(self, addr: Tuple[str,int], text_stream, label: str) -> int:
+        """
+        边生成边下发：文本流每凑出完整句子就合成 MP3，这一批片段合成完即一次发给客户端，
+        首句音频不必等 LLM 输出完、也不必等之后的句子合成完
+
+        Returns:
+            int: 发送的片段数
+        """
+        total = size_sum = 0
+        for segs in self.tts_udp.iter_mp3_segments_from_stream(text_stream):
+            for b in segs:
+                total += 1
+                size_sum += len(b)
+                print(f"发送{label}段 {total}，大小: {len(b)}")
+            # 同一批句子合成的片段一次发出（Linux 下为一次 sendmmsg）
+            self._send_mp3_segments(addr, segs)
+        if total:
+            print(f"{label}共 {total} 段，总大小: {size_sum} 字节，已发送给 {addr}")
+        return total
+
+    def _send_mp3_segments(self, addr: Tuple[str,int], seg_list: List[bytes]):
+        """
+        一次发出全部 MP3 片段（Linux 下为一次 sendmmsg，其他平台逐段 sendto）
+
+        客户端按到达顺序排队串行播放，不需要在片段之间 sleep 控制节奏；
+        突发由客户端放大的接收缓冲吸收。
+        """
         try:
-            down = ADPCMProtocol.pack_audio_packet(mp3_bytes, ADPCMProtocol.COMPRESSION_TTS_MP3)
-            self.sock.sendto(down, addr)
-            print(f"✅ MP3 发送成功给 {addr}")
+            packets = [ADPCMProtocol.pack_audio_packet(b, ADPCMProtocol.COMPRESSION_TTS_MP3)
+                       for b in seg_list]
+            sent = send_many(self.sock, packets, addr)
+            print(f"✅ {sent} 段 MP3 发送成功给 {addr}")
         except Exception as e:
             print(f"MP3 发送失败: {e}")
 
-
     def reset_client_session(self, addr: Tuple[str,int]):
         """重置指定客户端的会话状态"""
         if addr in self.client_codecs:
@@ -212,14 +321,16 @@ class UDPVoiceServer:
             ai.conversation_history.clear()
             print(f"已重置客户端 {addr} 的 AI 对话历史")
 
-        # 清空队列
+        # 清空队列（逐个取出，未处理的解码块归还池中）
         if addr in self.client_queues:
             q = self.client_queues[addr]
-            while not q.empty():
+            dropped = []
+            while True:
                 try:
-                    q.get_nowait()
-                except queue.Empty:
+                    dropped.append(q.popleft())
+                except IndexError:
                     break
+            self._recycle_blocks(dropped)
             print(f"已清空客户端 {addr} 的音频队列")
 
         # 重置开场白标记，下次连接会重新发送
@@ -229,7 +340,7 @@ class UDPVoiceServer:
 
     def cleanup_inactive_clients(self, timeout_seconds=300):
         """清理超时的客户端会话（5分钟无活动）"""
-        current_time = time.time()
+        current_time = time.monotonic()
         inactive_clients = []
 
         for addr, last_time in self.client_last_activity.items():
@@ -242,97 +353,182 @@ class UDPVoiceServer:
             # 删除记录
             self.client_last_activity.pop(addr, None)
             self.client_codecs.pop(addr, None)
+            # 客户端已无活动、录音缓冲已在上面清空，暂存的块可以归还
+            self._recycle_blocks(self._held_blocks.pop(addr, ()))
+            with self._jobs_lock:
+                self.client_jobs.pop(addr, None)
             self.client_queues.pop(addr, None)
             self.client_handlers.pop(addr, None)
             self.client_ai.pop(addr, None)
             self.client_welcomed.discard(addr)
 
-    def _recv_loop(self):
+    def _recv_loop(self, sock: socket.socket):
+        # 按首字节的包类型查表分发，代替逐个比较的 if/elif 链；未知类型直接忽略
+        handlers = {
+            ADPCMProtocol.COMPRESSION_ADPCM: self._on_audio_frame,
+            ADPCMProtocol.COMPRESSION_ADPCM_BATCH: self._on_audio_batch,
+            ADPCMProtocol.CONTROL_RESET: self._on_reset,
+            ADPCMProtocol.CONTROL_HELLO: self._on_hello,
+        }
+        get_handler = handlers.get
+        unpack = ADPCMProtocol.unpack_audio_packet
+        monotonic = time.monotonic
+        last_activity = self.client_last_activity
+
+        def dispatch(pkt, addr):
+            compression_type, payload = unpack(pkt)
+            handler = get_handler(compression_type)
+            if handler is not None:
+                # 每个数据报只取一次时间（批量包内的多帧共用），用单调时钟
+                last_activity[addr] = monotonic()
+                handler(addr, payload)
+
+        if RECVMMSG_AVAILABLE:
+            # Linux：select 唤醒后一次 recvmmsg 取出至多 32 个数据报。recvmmsg 带
+            # MSG_DONTWAIT，套接字本身保持阻塞模式，下行发送不受影响。
+            # 包体是接收缓冲区视图，各处理函数当场解码、不保留引用
+            sel = selectors.DefaultSelector()
+            sel.register(sock, selectors.EVENT_READ)
+            receiver = BatchReceiver(sock, bufsize=MAX_UDP)
+            while self.running:
+                try:
+                    if not sel.select(timeout=1.0):
+                        continue
+                    batch = receiver.recv()
+                except Exception as e:
+                    print(f"recv_loop error: {e}")
+                    time.sleep(0.01)
+                    continue
+                for pkt, addr in batch:
+                    try:
+                        dispatch(pkt, addr)
+                    except Exception as e:
+                        print(f"recv_loop error: {e}")
+            return
+
+        recvfrom = sock.recvfrom
         while self.running:
             try:
-                pkt, addr = self.sock.recvfrom(MAX_UDP)
-                compression_type, payload = ADPCMProtocol.unpack_audio_packet(pkt)
-                if compression_type == ADPCMProtocol.COMPRESSION_ADPCM:
-                    # 更新客户端活动时间
-                    self.client_last_activity[addr] = time.time()
-
-                    # 新客户端首次连接，立即发送开场白
-                    if addr not in self.client_welcomed:
-                        self.client_welcomed.add(addr)
-                        self._send_opening_statement(addr)
-
-                    codec = self._get_client_codec(addr)
-                    float_block = codec.decode(payload)  # float32 PCM ~512
-                    q = self._get_client_queue(addr)
-                    try:
-                        q.put_nowait(float_block)
-                    except queue.Full:
-                        _ = q.get_nowait()
-                        q.put_nowait(float_block)
-                elif compression_type == ADPCMProtocol.CONTROL_RESET:
-                    self.reset_client_session(addr)
-                elif compression_type == ADPCMProtocol.CONTROL_HELLO:
-                    # 客户端连接信号，发送开场白
-                    if addr not in self.client_welcomed:
-                        self.client_welcomed.add(addr)
-                        self._send_opening_statement(addr)
-                else:
-                    # 其他类型暂不处理
-                    pass
+                pkt, addr = recvfrom(MAX_UDP)
+                dispatch(pkt, addr)
             except Exception as e:
                 print(f"recv_loop error: {e}")
                 time.sleep(0.01)
 
+    def _on_audio_batch(self, addr: Tuple[str,int], payload):
+        """客户端把多帧合并成一个包发送，逐帧按原逻辑处理"""
+        for frame in ADPCMProtocol.unpack_audio_batch(payload):
+            self._on_audio_frame(addr, frame)
+
+    def _on_reset(self, addr: Tuple[str,int], payload):
+        self.reset_client_session(addr)
+
+    def _on_hello(self, addr: Tuple[str,int], payload):
+        """客户端连接信号，发送开场白"""
+        if addr not in self.client_welcomed:
+            self.client_welcomed.add(addr)
+            # 开场白同样由工作线程生成，接收线程不等 LLM/TTS
+            self._submit_client_job(addr, self._send_opening_statement)
+
+    def _on_audio_frame(self, addr: Tuple[str,int], payload):
+        """处理一帧上行 ADPCM 音频：解码后放入该客户端的队列（活动时间由 _recv_loop 按包更新）"""
+        # 新客户端首次连接，立即发送开场白
+        if addr not in self.client_welcomed:
+            self.client_welcomed.add(addr)
+            # 开场白同样由工作线程生成，接收线程不等 LLM/TTS
+            self._submit_client_job(addr, self._send_opening_statement)
+
+        codec = self._get_client_codec(addr)
+        if len(payload) * 2 == FRAME_SAMPLES:
+            # 标准帧：解码进池中的预分配块，不为每帧新建数组
+            try:
+                float_block = self._block_pool.pop()
+            except IndexError:
+                float_block = np.empty(FRAME_SAMPLES, dtype=np.float32)
+            codec.decode_into(payload, float_block)
+        else:
+            float_block = codec.decode(payload)  # float32 PCM
+        q = self._get_client_queue(addr)
+        if len(q) == q.maxlen:
+            # 队列已满：append 会挤掉最旧的一帧，先取出归还池中
+            try:
+                self._recycle_blocks((q.popleft(),))
+            except IndexError:
+                pass  # 处理线程刚好取走了
+        q.append(float_block)
+        self._frames_ready.set()
+
+    def _release_block(self, addr: Tuple[str,int], handler: AudioHandler, block: np.ndarray):
+        """
+        把处理完的解码块归还到池中
+
+        录音中的块被 handler.audio_buffer 引用，先记下；缓冲区被触发打包
+        （np.concatenate 已拷贝）或清空后，再连同这些块一起归还
+        """
+        held = self._held_blocks.setdefault(addr, [])
+        if handler.audio_buffer and handler.audio_buffer[-1] is block:
+            held.append(block)
+            return
+        self._recycle_blocks((block,))
+        if held:
+            self._recycle_blocks(held)
+            held.clear()
+
+    def _recycle_blocks(self, blocks):
+        """把不再被引用的解码块放回池中（非标准长度的块不入池）"""
+        self._block_pool.extend(b for b in blocks if b.size == FRAME_SAMPLES)
+
+    def _handle_triggered(self, addr: Tuple[str,int], triggered: np.ndarray):
+        """工作线程：整段 audio → 真实链路（转写→LLM→TTS→下行），经 client_jobs 同一客户端串行执行"""
+        try:
+            from whisper.prompts import WHISPER_PROMPT
+            text = self.transcriber.transcribe_audio(
+                triggered,
+                config.LANGUAGE_CODE,
+                initial_prompt=WHISPER_PROMPT
+            )
+            print(f"转写结果: {text}")
+            if text:
+                print(f"开始 AI 对话生成...")
+                kimi = self._get_client_ai(addr)
+                resp_stream = kimi.get_response_stream(text)
+                # 统一下行格式：可独立播放的 MP3 片段，逐句合成逐句发送
+                if not self._stream_tts_to_client(addr, resp_stream, "回复"):
+                    print("TTS 生成失败，无 MP3 数据")
+        except Exception as e:
+            print(f"客户端 {addr} 回复生成失败: {e}")
+
     def _process_loop(self):
         """遍历所有客户端队列，按现有主逻辑处理，触发后下行 MP3"""
         while self.running:
             try:
+                # 先清标志再扫描：扫描期间新到的帧会重新置位，下面的 wait 立即返回
+                self._frames_ready.clear()
+                processed_any = False
                 for addr, q in list(self.client_queues.items()):
-                    # 拉取尽可能多的块（但不阻塞）
-                    processed_any = False
-                    while not q.empty():
-                        float_block = q.get_nowait()
+                    # 拉取尽可能多的块（但不阻塞）。VAD 逐客户端逐帧推理：Silero 的循环状态
+                    # 按批次行保存、批大小变化即重置，不能把不同客户端的帧拼成一批
+                    while q:
+                        float_block = q.popleft()
                         processed_any = True
                         is_speech = self.vad.is_speech(float_block)
                         handler = self._get_client_handler(addr)
                         triggered = handler.process_chunk(float_block, is_speech)
+                        self._release_block(addr, handler, float_block)
                         if triggered is not None:
                             print(f"客户端 {addr} 触发转写，音频长度: {len(triggered)} 采样")
-                            # 触发：整段 audio → 真实链路（转写→LLM→TTS）
-                            from whisper.prompts import WHISPER_PROMPT
-                            text = self.transcriber.transcribe_audio(
-                                triggered,
-                                config.LANGUAGE_CODE,
-                                initial_prompt=WHISPER_PROMPT
-                            )
-                            print(f"转写结果: {text}")
-                            if text:
-                                print(f"开始 AI 对话生成...")
-                                kimi = self._get_client_ai(addr)
-                                resp_stream = kimi.get_response_stream(text)
-                                # 统一下行格式：切分为可独立播放的 MP3 片段
-                                seg_list = self.tts_udp.generate_mp3_segments_from_stream(resp_stream)
-                                if seg_list:
-                                    total = len(seg_list)
-                                    size_sum = sum(len(b) for b in seg_list)
-                                    print(f"TTS 共 {total} 段，总大小: {size_sum} 字节，将依次发送给 {addr}")
-                                    for i, b in enumerate(seg_list, 1):
-                                        print(f"发送回复段 {i}/{total}，大小: {len(b)}")
-                                        self._send_mp3_safe(addr, b)
-                                        # 间隔 0.2s，确保前端先消费前一段
-                                        time.sleep(0.2)
-                                else:
-                                    print("TTS 生成失败，无 MP3 数据")
-                    if not processed_any:
-                        # 降低 CPU 占用
-                        time.sleep(0.005)
+                            # 转写→LLM→TTS 交给工作线程，本循环继续为所有客户端做 VAD
+                            self._submit_client_job(addr, self._handle_triggered, triggered)
+                if not processed_any:
+                    # 所有队列都空：等到有新帧（最多 1 秒，以便执行下面的定期清理）
+                    self._frames_ready.wait(1.0)
 
                 # 定期清理超时客户端（每30秒检查一次）
-                if hasattr(self, '_last_cleanup') and time.time() - self._last_cleanup > 30:
+                if hasattr(self, '_last_cleanup') and time.monotonic() - self._last_cleanup > 30:
                     self.cleanup_inactive_clients()
-                    self._last_cleanup = time.time()
+                    self._last_cleanup = time.monotonic()
                 elif not hasattr(self, '_last_cleanup'):
-                    self._last_cleanup = time.time()
+                    self._last_cleanup = time.monotonic()
             except Exception as e:
                 print(f"process_loop error: {e}")
                 time.sleep(0.01)
@@ -357,7 +553,7 @@ if __name__ == "__main__":
                     if cmd == 'clients':
                         print(f"活跃客户端 ({len(server.client_last_activity)}):")
                         for addr, last_time in server.client_last_activity.items():
-                            age = time.time() - last_time
+                            age = time.monotonic() - last_time
                             print(f"  {addr[0]}:{addr[1]} (最后活动: {age:.1f}秒前)")
                     elif cmd.startswith('reset '):
                         try:
@@ -7,6 +7,7 @@ ADPCM编解码器测试套件
 
 import numpy as np
 import time
+import adpcm_codec
 from adpcm_codec import ADPCMCodec, ADPCMProtocol
 
 def test_basic_roundtrip():
@@ -62,6 +63,99 @@ def test_basic_roundtrip():
     print("  ✅ 基础往返测试通过")
     return True
 
+def _sine_blocks(block_size=512, seconds=1.0, hz=440):
+    """1秒正弦波按块切分（最后一块补零），供各编码接口的一致性测试使用"""
+    sample_rate = 16000
+    t = np.linspace(0, seconds, int(sample_rate * seconds))
+    audio = np.sin(2 * np.pi * hz * t).astype(np.float32)
+    n_blocks = -(-len(audio) // block_size)
+    padded = np.zeros(n_blocks * block_size, dtype=np.float32)
+    padded[:len(audio)] = audio
+    return list(padded.reshape(n_blocks, block_size))
+
+def test_encode_into():
+    """encode_into 写入预分配缓冲区测试"""
+    print("📝 encode_into 测试...")
+
+    codec = ADPCMCodec()
+    into_codec = ADPCMCodec()
+    into_buf = np.empty(256, dtype=np.uint8)
+
+    # 跨块状态延续：逐块与 encode 输出一致
+    for block in _sine_blocks():
+        compressed = codec.encode(block)
+        m = into_codec.encode_into(block, into_buf)
+        assert m == len(compressed)
+        assert into_buf[:m].tobytes() == compressed, "encode_into 与 encode 输出不一致"
+    assert into_codec.encode_state == codec.encode_state
+
+    print("  ✅ encode_into 测试通过")
+    return True
+
+def test_encode_into_packet():
+    """encode_into_packet 直接编码进数据包缓冲区测试"""
+    print("📝 encode_into_packet 测试...")
+
+    codec = ADPCMCodec()
+    packet_codec = ADPCMCodec()
+    packet_buf = bytearray(512)
+
+    # 结果应与 encode + pack_audio_packet 逐字节一致
+    for block in _sine_blocks():
+        expected = ADPCMProtocol.pack_audio_packet(codec.encode(block), ADPCMProtocol.COMPRESSION_ADPCM)
+        packet = packet_codec.encode_into_packet(block, packet_buf)
+        assert bytes(packet) == bytes(expected), "encode_into_packet 与 encode + 打包结果不一致"
+
+    print("  ✅ encode_into_packet 测试通过")
+    return True
+
+def test_encode_decode_batch():
+    """encode_batch / decode_batch 批量编解码测试"""
+    print("📚 批量编解码测试...")
+
+    blocks = _sine_blocks()
+    audio = np.concatenate(blocks)
+
+    # 整段批量编码与逐块 encode 一致（状态跨块延续），末尾不足一块的部分也编码
+    codec = ADPCMCodec()
+    expected = [codec.encode(b) for b in blocks]
+    batch_codec = ADPCMCodec()
+    assert batch_codec.encode_batch(audio, 512) == expected, "encode_batch 与逐块 encode 不一致"
+    tail = ADPCMCodec().encode_batch(audio[:1000], 512)
+    assert [len(b) for b in tail] == [256, 244]
+
+    # 批量解码与逐块 decode 拼接一致
+    decoder = ADPCMCodec()
+    reference = np.concatenate([decoder.decode(b) for b in expected])
+    decoded = ADPCMCodec().decode_batch(expected)
+    assert decoded.dtype == np.float32
+    assert np.array_equal(decoded, reference), "decode_batch 与逐块 decode 不一致"
+
+    print("  ✅ 批量编解码测试通过")
+    return True
+
+def test_decode_into():
+    """decode_into 解码到预分配缓冲区测试"""
+    print("📝 decode_into 测试...")
+
+    encoder = ADPCMCodec()
+    codec = ADPCMCodec()
+    into_codec = ADPCMCodec()
+    decode_buf = np.empty(512, dtype=np.float32)
+
+    for i, block in enumerate(_sine_blocks()):
+        compressed = encoder.encode(block)
+        decoded = codec.decode(compressed)
+        # bytes（只读）与可写缓冲区上的 memoryview（批量接收路径）两种输入交替
+        payload = compressed if i % 2 else memoryview(bytearray(compressed))
+        n = into_codec.decode_into(payload, decode_buf)
+        assert n == len(decoded)
+        assert np.array_equal(decode_buf[:n], decoded), "decode_into 与 decode 输出不一致"
+    assert into_codec.decode_state == codec.decode_state
+
+    print("  ✅ decode_into 测试通过")
+    return True
+
 def test_protocol_packing():
     """协议打包测试"""
     print("📦 协议打包测试...")
@@ -85,6 +179,27 @@ def test_protocol_packing():
     print("  ✅ 协议打包测试通过")
     return True
 
+def test_batch_packing():
+    """多帧合并包测试"""
+    print("📦 多帧合并包测试...")
+
+    test_data = b"ADPCM_TEST_DATA_12345"
+
+    # 多帧合并包：拆包后逐帧还原
+    frames = [test_data, b"", b"\x01" * 256]
+    batch = ADPCMProtocol.pack_audio_batch(frames)
+    compression_type, payload = ADPCMProtocol.unpack_audio_packet(bytes(batch))
+    assert compression_type == ADPCMProtocol.COMPRESSION_ADPCM_BATCH
+    assert [bytes(f) for f in ADPCMProtocol.unpack_audio_batch(payload)] == frames
+
+    # 只有一帧时就地改写为普通 ADPCM 包，与 pack_audio_packet 字节一致
+    single = ADPCMProtocol.pack_audio_batch([test_data])
+    start = ADPCMProtocol.pack_single_header_into(single, len(single))
+    assert bytes(single[start:]) == bytes(ADPCMProtocol.pack_audio_packet(test_data))
+
+    print("  ✅ 多帧合并包测试通过")
+    return True
+
 def test_multi_client_simulation():
     """多客户端模拟测试"""
     print("👥 多客户端模拟测试...")
@@ -264,6 +379,34 @@ def test_bandwidth_calculation():
     print("  ✅ 带宽计算验证通过")
     return True
 
+def test_ima_fallback_compat():
+    """IMA-ADPCM回退实现与audioop码流一致性测试"""
+    print("🔁 IMA-ADPCM回退实现兼容性测试...")
+
+    if not adpcm_codec.AUDIOOP_AVAILABLE:
+        print("  ⏭️ 当前Python无audioop，跳过对比")
+        return True
+
+    import audioop
+
+    # 跨块保持状态，覆盖奇数长度（最后半字节被丢弃）的情况
+    rng = np.random.default_rng(0)
+    enc_ref = enc_new = dec_ref = dec_new = None
+    for n in (512, 511, 1, 2048):
+        pcm = (rng.standard_normal(n) * 8000).clip(-32768, 32767).astype(np.int16)
+        ref, enc_ref = audioop.lin2adpcm(pcm.tobytes(), 2, enc_ref)
+        new, enc_new = adpcm_codec._lin2adpcm(pcm, enc_new)
+        assert new == ref, f"编码结果不一致 (n={n})"
+        assert enc_new == enc_ref, f"编码状态不一致 (n={n})"
+
+        ref_pcm, dec_ref = audioop.adpcm2lin(ref, 2, dec_ref)
+        new_pcm, dec_new = adpcm_codec._adpcm2lin(new, dec_new)
+        assert new_pcm.tobytes() == ref_pcm, f"解码结果不一致 (n={n})"
+        assert dec_new == dec_ref, f"解码状态不一致 (n={n})"
+
+    print("  ✅ IMA-ADPCM回退实现兼容性测试通过")
+    return True
+
 def run_all_tests():
     """运行所有测试"""
     print("🧪 ADPCM编解码器测试套件")
@@ -271,11 +414,17 @@ def run_all_tests():
     
     tests = [
         ("基础往返测试", test_basic_roundtrip),
+        ("encode_into 测试", test_encode_into),
+        ("encode_into_packet 测试", test_encode_into_packet),
+        ("批量编解码测试", test_encode_decode_batch),
+        ("decode_into 测试", test_decode_into),
         ("协议打包测试", test_protocol_packing),
+        ("多帧合并包测试", test_batch_packing),
         ("多客户端模拟", test_multi_client_simulation),
         ("边界情况测试", test_edge_cases),
         ("性能测试", test_performance),
         ("带宽计算验证", test_bandwidth_calculation),
+        ("IMA回退兼容性", test_ima_fallback_compat),
     ]
     
     passed = 0
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TTS UDP 适配器测试
+验证流式切句：每凑出完整句子就产出一批 MP3 片段（合成函数替换为本地桩，不访问 edge-tts）
+"""
+
+from tts_module_udp_adapter import TTSModuleUDPAdapter
+
+def _make_adapter(log):
+    """合成结果直接用文本字节代替 MP3，并记录每次合成的文本"""
+    adapter = TTSModuleUDPAdapter()
+
+    def fake_tts(text, max_bytes=60000):
+        log.append(text)
+        return [text.encode("utf-8")]
+
+    adapter._tts_bytes_with_size_limit = fake_tts
+    return adapter
+
+def test_iter_segments_streaming():
+    """流式切句测试：完整句子在后续文本到达前就已合成"""
+    print("🗣️ 流式切句测试...")
+
+    log = []
+    adapter = _make_adapter(log)
+
+    def text_stream():
+        for part in ["你好，", "我是", "助手。今天", "天气不错！要", "出去吗", "？好的"]:
+            log.append("<token>")
+            yield part
+
+    batches = [[b.decode("utf-8") for b in segs]
+               for segs in adapter.iter_mp3_segments_from_stream(text_stream())]
+
+    assert batches == [["你好，我是助手。"], ["今天天气不错！"], ["要出去吗？"], ["好的"]], \
+        f"分批结果不符: {batches}"
+    # 第一句在第 4 段文本到达之前合成
+    assert log.index("你好，我是助手。") < log.index("<token>", 3), f"首句未及时合成: {log}"
+
+    print("  ✅ 流式切句测试通过")
+    return True
+
+def test_iter_segments_empty():
+    """空文本 / 无内容时不产出空批次"""
+    print("🗣️ 空文本测试...")
+
+    log = []
+    adapter = _make_adapter(log)
+
+    assert list(adapter.iter_mp3_segments_from_stream(iter([]))) == []
+    assert list(adapter.iter_mp3_segments_from_stream(iter(["  ", "\n"]))) == []
+    assert log == [], f"不应合成空文本: {log}"
+
+    # 末尾没有句末标点的残余文本仍然合成
+    batches = list(adapter.iter_mp3_segments_from_stream(iter(["再见"])))
+    assert batches == [["再见".encode("utf-8")]], f"残余文本未合成: {batches}"
+
+    print("  ✅ 空文本测试通过")
+    return True
+
+def run_all_tests():
+    """运行所有测试"""
+    print("🧪 TTS UDP 适配器测试")
+    print("=" * 50)
+
+    tests = [
+        ("流式切句测试", test_iter_segments_streaming),
+        ("空文本测试", test_iter_segments_empty),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_name, test_func in tests:
+        try:
+            print(f"\n{test_name}:")
+            if test_func():
+                passed += 1
+            else:
+                failed += 1
+        except Exception as e:
+            print(f"  ❌ {test_name}失败: {e}")
+            failed += 1
+
+    print("\n" + "=" * 50)
+    print(f"测试结果: {passed}通过, {failed}失败")
+    return failed == 0
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    exit(0 if success else 1)
@@ -11,6 +11,7 @@ UDP 音频端到端连通性测试（聚焦新增环节）
 import threading
 import time
 import socket
+import collections
 import numpy as np
 
 from adpcm_codec import ADPCMCodec, ADPCMProtocol
@@ -89,8 +90,34 @@ def test_multi_clients_basic(n=2):
     print(f"✅ 多客户端基本回传成功：{success}/{n}")
     return True
 
+def test_block_pool_overflow():
+    """客户端队列溢出与会话重置时，被丢弃的解码块都回到池中"""
+    srv = UDPVoiceServer(port=0)  # 只调用入队/重置，不启动线程
+    try:
+        addr = ("127.0.0.1", 50000)
+        srv.client_welcomed.add(addr)  # 不触发开场白
+        srv.client_queues[addr] = collections.deque(maxlen=8)
+        frame = ADPCMCodec().encode(np.zeros(512, dtype=np.float32))
+        pool_size = len(srv._block_pool)
+
+        for _ in range(20):
+            srv._on_audio_frame(addr, frame)
+        q = srv.client_queues[addr]
+        assert len(q) == 8
+        # 挤掉的 12 帧已归还：池中块数 + 队列中块数 = 初始池大小
+        assert len(srv._block_pool) + len(q) == pool_size, "溢出丢弃的块未归还"
+
+        srv.reset_client_session(addr)
+        assert len(q) == 0
+        assert len(srv._block_pool) == pool_size, "重置清空的块未归还"
+    finally:
+        srv.stop()
+    print("✅ 解码块池溢出/重置归还正常")
+    return True
+
 if __name__ == "__main__":
+    ok0 = test_block_pool_overflow()
     ok1 = test_single_client_roundtrip()
     ok2 = test_multi_clients_basic(2)
-    print("All tests:", ok1 and ok2)
+    print("All tests:", ok0 and ok1 and ok2)
 
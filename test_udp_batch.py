@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UDP 批量收发测试
+本机回环验证 send_many / BatchReceiver：sendmmsg/recvmmsg 路径与逐个 sendto/recvfrom 回退路径
+"""
+
+import socket
+import time
+import udp_batch
+from udp_batch import BatchReceiver, send_many
+
+def _socket_pair():
+    """回环上的一对 UDP 套接字；接收端为非阻塞（BatchReceiver 的要求）"""
+    rx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    rx.bind(("127.0.0.1", 0))
+    rx.setblocking(False)
+    tx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    tx.bind(("127.0.0.1", 0))
+    return tx, rx
+
+def _recv_all(receiver, count, timeout=2.0):
+    """反复 recv() 直到收齐 count 个数据报，返回 [(bytes, addr), ...]"""
+    out = []
+    deadline = time.time() + timeout
+    while len(out) < count and time.time() < deadline:
+        batch = receiver.recv()
+        assert len(batch) <= receiver.capacity
+        # 批量路径下包体是内部缓冲区视图，下一次 recv() 前拷贝出来
+        out.extend((bytes(pkt), addr) for pkt, addr in batch)
+        if not batch:
+            time.sleep(0.01)
+    return out
+
+def _check_loopback(n=40, capacity=16):
+    tx, rx = _socket_pair()
+    try:
+        receiver = BatchReceiver(rx, capacity=capacity, bufsize=2048)
+        assert receiver.recv() == [], "无数据时应返回空列表"
+
+        packets = [bytes([i]) * (i * 37 % 1500) for i in range(n)]
+        packets[1] = bytearray(packets[1])  # 可写缓冲区同样支持
+        assert send_many(tx, packets, rx.getsockname()) == n
+
+        got = _recv_all(receiver, n)
+        assert [data for data, _ in got] == [bytes(p) for p in packets], "内容或顺序不一致"
+        assert all(addr == tx.getsockname() for _, addr in got), "源地址解析错误"
+        assert receiver.recv() == []
+    finally:
+        tx.close()
+        rx.close()
+
+def test_loopback_batch():
+    """send_many 发 N 个数据报，BatchReceiver 分多批收齐"""
+    print("📨 批量收发回环测试...")
+    if not (udp_batch.SENDMMSG_AVAILABLE and udp_batch.RECVMMSG_AVAILABLE):
+        print("  ⏭️ 当前平台无 sendmmsg/recvmmsg，跳过（回退路径见下一项）")
+        return True
+    _check_loopback()
+    print("  ✅ 批量收发回环测试通过")
+    return True
+
+def test_fallback_path():
+    """关闭 sendmmsg/recvmmsg 后走逐个 sendto/recvfrom，结果相同"""
+    print("📨 回退路径测试...")
+    saved = udp_batch.SENDMMSG_AVAILABLE, udp_batch.RECVMMSG_AVAILABLE
+    udp_batch.SENDMMSG_AVAILABLE = udp_batch.RECVMMSG_AVAILABLE = False
+    try:
+        _check_loopback()
+    finally:
+        udp_batch.SENDMMSG_AVAILABLE, udp_batch.RECVMMSG_AVAILABLE = saved
+    print("  ✅ 回退路径测试通过")
+    return True
+
+def test_truncation():
+    """超过 bufsize 的数据报被截断为 bufsize，不越界写入相邻槽位"""
+    print("✂️ 截断测试...")
+    tx, rx = _socket_pair()
+    try:
+        receiver = BatchReceiver(rx, capacity=4, bufsize=64)
+        packets = [b"a" * 100, b"b" * 10, b"c" * 64]
+        send_many(tx, packets, rx.getsockname())
+        got = [data for data, _ in _recv_all(receiver, len(packets))]
+        assert got == [b"a" * 64, b"b" * 10, b"c" * 64], f"截断结果不符: {[len(d) for d in got]}"
+    finally:
+        tx.close()
+        rx.close()
+    print("  ✅ 截断测试通过")
+    return True
+
+def test_partial_send():
+    """sendmmsg 每次只发出部分数据报时，send_many 继续发送剩余部分"""
+    print("🔁 部分发送测试...")
+    if not udp_batch.SENDMMSG_AVAILABLE:
+        print("  ⏭️ 当前平台无 sendmmsg，跳过")
+        return True
+
+    real_sendmmsg = udp_batch._sendmmsg
+    calls = []
+
+    def one_at_a_time(fd, msgvec, vlen, flags):
+        calls.append(vlen)
+        return real_sendmmsg(fd, msgvec, min(vlen, 1), flags)
+
+    tx, rx = _socket_pair()
+    udp_batch._sendmmsg = one_at_a_time
+    try:
+        packets = [b"%d" % i for i in range(5)]
+        assert send_many(tx, packets, rx.getsockname()) == 5
+        assert calls == [5, 4, 3, 2, 1], f"未按剩余数量续发: {calls}"
+        receiver = BatchReceiver(rx)
+        assert [data for data, _ in _recv_all(receiver, 5)] == packets
+    finally:
+        udp_batch._sendmmsg = real_sendmmsg
+        tx.close()
+        rx.close()
+    print("  ✅ 部分发送测试通过")
+    return True
+
+def test_non_ipv4_address():
+    """目标为主机名（非 IPv4 字面量）时 send_many 回退为 sendto"""
+    print("🌐 非 IPv4 字面量地址测试...")
+    tx, rx = _socket_pair()
+    try:
+        port = rx.getsockname()[1]
+        assert send_many(tx, [b"x", b"y"], ("localhost", port)) == 2
+        got = [data for data, _ in _recv_all(BatchReceiver(rx), 2)]
+        assert got == [b"x", b"y"]
+    finally:
+        tx.close()
+        rx.close()
+    print("  ✅ 非 IPv4 字面量地址测试通过")
+    return True
+
+def test_addr_cache_bounded():
+    """目标地址缓存有上限：大量不同源端口（NAT 重连）不会让缓存无限增长"""
+    print("🗂️ 地址缓存上限测试...")
+    for port in range(1, udp_batch._ADDR_CACHE_SIZE * 4):
+        udp_batch._sockaddr_in(("10.0.0.1", port))
+    assert udp_batch._sockaddr_in.cache_info().currsize <= udp_batch._ADDR_CACHE_SIZE
+    assert udp_batch._sockaddr_in(("::1", 1)) is None
+    print("  ✅ 地址缓存上限测试通过")
+    return True
+
+def run_all_tests():
+    """运行所有测试"""
+    print("🧪 UDP 批量收发测试")
+    print("=" * 50)
+
+    tests = [
+        ("批量收发回环", test_loopback_batch),
+        ("回退路径", test_fallback_path),
+        ("截断", test_truncation),
+        ("部分发送", test_partial_send),
+        ("非IPv4地址", test_non_ipv4_address),
+        ("地址缓存上限", test_addr_cache_bounded),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_name, test_func in tests:
+        try:
+            print(f"\n{test_name}:")
+            if test_func():
+                passed += 1
+            else:
+                failed += 1
+        except Exception as e:
+            print(f"  ❌ {test_name}失败: {e}")
+            failed += 1
+
+    print("\n" + "=" * 50)
+    print(f"测试结果: {passed}通过, {failed}失败")
+    return failed == 0
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    exit(0 if success else 1)
@@ -92,16 +92,36 @@ class TTSModuleUDPAdapter:
             return b""
         return asyncio.run(self._edge_tts_bytes_async(text))
 
-    def generate_mp3_segments_from_stream(self, text_stream):
-        """将文本流切句后逐句 TTS，返回多个 mp3 片段（每段尽量 < 60KB）"""
-        text = "".join(part for part in text_stream)
+    def iter_mp3_segments_from_stream(self, text_stream):
+        """
+        边接收文本流边合成：每凑出完整的句子就立即 TTS，
+        第一句的音频不必等整段回复生成完（每段尽量 < 60KB）
+
+        Yields:
+            List[bytes]: 本次凑出的完整句子合成的 mp3 片段（非空），调用方可一次批量发出
+        """
+        buf = ""
+        for part in text_stream:
+            buf += part
+            # 最后一个句末标点之前的文本都已是完整句子
+            last = max(buf.rfind(p) for p in "。！？!?；;")
+            if last == -1:
+                continue
+            done, buf = buf[:last + 1], buf[last + 1:]
+            segs = self._synthesize_sentences(done)
+            if segs:
+                yield segs
+        segs = self._synthesize_sentences(buf)
+        if segs:
+            yield segs
+
+    def _synthesize_sentences(self, text: str):
+        """切句后逐句 TTS，返回 mp3 片段列表"""
         if not text.strip():
             return []
-        segs = self._split_sentences(text)
         mp3_list = []
-        for s in segs:
+        for s in self._split_sentences(text):
             # 确保每个片段都不超过 UDP 安全上限
             seg_bytes_list = self._tts_bytes_with_size_limit(s, max_bytes=58000)
             mp3_list.extend(seg_bytes_list)
         return mp3_list
-
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UDP 批量收发
+- Linux：通过 ctypes 调用 sendmmsg(2) / recvmmsg(2)，一次系统调用收发多个数据报
+- 其他平台 / 非 IPv4 地址：回退为逐个 sendto / recvfrom
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import functools
+import os
+import socket
+import struct
+import sys
+from typing import List, Optional, Sequence, Tuple
+
+
+class _IOVec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint32),
+        ("msg_iov", ctypes.POINTER(_IOVec)),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int),
+    ]
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", _MsgHdr), ("msg_len", ctypes.c_uint)]
+
+
+def _load_libc(name: str, argtypes: list):
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fn = getattr(libc, name)
+    except (OSError, AttributeError):
+        return None
+    fn.argtypes = argtypes
+    fn.restype = ctypes.c_int
+    return fn
+
+
+_sendmmsg = _load_libc("sendmmsg", [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int])
+_recvmmsg = _load_libc("recvmmsg", [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_void_p])
+SENDMMSG_AVAILABLE = _sendmmsg is not None
+RECVMMSG_AVAILABLE = _recvmmsg is not None
+
+_MSG_DONTWAIT = 0x40
+_SOCKADDR_LEN = 16  # sizeof(struct sockaddr_in)
+_FAMILY = struct.Struct("=H")  # sin_family：主机字节序
+_PORT = struct.Struct("!H")    # sin_port：网络字节序
+
+# sockaddr_in 缓存：(ip, port) -> 16 字节结构体。按 LRU 限定条目数，
+# 长期运行的服务器面对 NAT 后不断变化的源端口时不会无限增长
+_ADDR_CACHE_SIZE = 256
+
+
+@functools.lru_cache(maxsize=_ADDR_CACHE_SIZE)
+def _sockaddr_in(addr: Tuple[str, int]) -> Optional[ctypes.Array]:
+    """构造 struct sockaddr_in；非 IPv4 字面量地址返回 None（走回退路径）"""
+    try:
+        raw = _FAMILY.pack(socket.AF_INET) + _PORT.pack(addr[1]) \
+            + socket.inet_aton(addr[0]) + bytes(8)
+    except (OSError, TypeError, IndexError, struct.error):
+        return None
+    return ctypes.create_string_buffer(raw, len(raw))
+
+
+def _buf_ptr(data) -> ctypes.c_void_p:
+    if isinstance(data, bytes):
+        return ctypes.cast(ctypes.c_char_p(data), ctypes.c_void_p)
+    return ctypes.c_void_p(ctypes.addressof((ctypes.c_char * len(data)).from_buffer(data)))
+
+
+def _msg_array(n: int, sa: ctypes.Array):
+    """构造 n 组 iovec/mmsghdr，目标地址与 iovec 指针预先填好"""
+    iov = (_IOVec * n)()
+    msgs = (_MMsgHdr * n)()
+    for i in range(n):
+        hdr = msgs[i].msg_hdr
+        hdr.msg_name = ctypes.addressof(sa)
+        hdr.msg_namelen = len(sa)
+        hdr.msg_iov = ctypes.pointer(iov[i])
+        hdr.msg_iovlen = 1
+    return iov, msgs
+
+
+def _sendmmsg_all(fd: int, msgs: ctypes.Array, n: int) -> int:
+    sent = 0
+    base = ctypes.addressof(msgs)
+    while sent < n:
+        ret = _sendmmsg(fd, base + sent * ctypes.sizeof(_MMsgHdr), n - sent, 0)
+        if ret < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        sent += ret
+    return sent
+
+
+def send_many(sock: socket.socket, packets: Sequence, addr: Tuple[str, int]) -> int:
+    """把多个数据报发往同一地址，返回成功发送的包数"""
+    n = len(packets)
+    if n == 0:
+        return 0
+    sa = _sockaddr_in(addr) if SENDMMSG_AVAILABLE and sock.family == socket.AF_INET else None
+    if n == 1 or sa is None:
+        for pkt in packets:
+            sock.sendto(pkt, addr)
+        return n
+
+    iov, msgs = _msg_array(n, sa)
+    for i, pkt in enumerate(packets):
+        iov[i].iov_base = _buf_ptr(pkt)
+        iov[i].iov_len = len(pkt)
+    return _sendmmsg_all(sock.fileno(), msgs, n)
+
+
+class BatchReceiver:
+    """
+    非阻塞批量接收器
+    
+    接收缓冲、iovec、mmsghdr 与源地址区在构造时一次分配；每次 recv()
+    用一次 recvmmsg 取出当前已到达的全部数据报（至多 capacity 个）。
+    """
+
+    def __init__(self, sock: socket.socket, capacity: int = 32, bufsize: int = 65507):
+        self.sock = sock
+        self.capacity = capacity
+        self.bufsize = bufsize
+        self._batched = RECVMMSG_AVAILABLE and sock.family == socket.AF_INET
+        if self._batched:
+            self._bufs = (ctypes.c_char * (bufsize * capacity))()
+            self._view = memoryview(self._bufs).cast('B')
+            self._names = (ctypes.c_char * (_SOCKADDR_LEN * capacity))()
+            self._iov = (_IOVec * capacity)()
+            self._msgs = (_MMsgHdr * capacity)()
+            buf_base = ctypes.addressof(self._bufs)
+            name_base = ctypes.addressof(self._names)
+            for i in range(capacity):
+                self._iov[i].iov_base = buf_base + i * bufsize
+                self._iov[i].iov_len = bufsize
+                hdr = self._msgs[i].msg_hdr
+                hdr.msg_name = name_base + i * _SOCKADDR_LEN
+                hdr.msg_iov = ctypes.pointer(self._iov[i])
+                hdr.msg_iovlen = 1
+
+    def recv(self) -> List[Tuple[object, Tuple[str, int]]]:
+        """
+        取出当前已到达的数据报，没有时返回空列表
+        
+        Returns:
+            [(packet, addr), ...]；packet 为 memoryview（切片不拷贝）。批量路径下
+            它指向内部缓冲区，只在下一次 recv() 之前有效，需要保留的数据请自行拷贝
+        """
+        if not self._batched:
+            out = []
+            while len(out) < self.capacity:
+                try:
+                    data, addr = self.sock.recvfrom(self.bufsize)
+                except BlockingIOError:
+                    break
+                out.append((memoryview(data), addr))
+            return out
+
+        msgs = self._msgs
+        for i in range(self.capacity):
+            msgs[i].msg_hdr.msg_namelen = _SOCKADDR_LEN
+        n = _recvmmsg(self.sock.fileno(), ctypes.addressof(msgs), self.capacity, _MSG_DONTWAIT, None)
+        if n < 0:
+            err = ctypes.get_errno()
+            if err in (errno.EAGAIN, errno.EWOULDBLOCK):
+                return []
+            raise OSError(err, os.strerror(err))
+
+        out = []
+        view, names, bufsize = self._view, self._names, self.bufsize
+        unpack_port = _PORT.unpack_from
+        for i in range(n):
+            off = i * bufsize
+            name_off = i * _SOCKADDR_LEN
+            port = unpack_port(names, name_off + 2)[0]
+            ip = socket.inet_ntoa(names[name_off + 4:name_off + 8])
+            out.append((view[off:off + msgs[i].msg_len], (ip, port)))
+        return out